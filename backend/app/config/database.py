@@ -1,20 +1,174 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from .settings import get_settings
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from typing import Any, Dict
+import threading
+import time
+from .settings import Settings, get_settings
 
 settings = get_settings()
 
-engine = create_engine(settings.database_url)
+# Drivers assíncronos usados para cada banco da DATABASE_URL
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+def async_database_url(database_url: str) -> URL:
+    """Converte a DATABASE_URL (síncrona) para o driver assíncrono equivalente"""
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        return url
+    url = url.set(drivername=f"{url.get_backend_name()}+{driver}")
+    if "sslmode" in url.query:
+        # asyncpg usa "ssl" no lugar do "sslmode" do libpq
+        url = url.difference_update_query(["sslmode"]).update_query_dict({"ssl": url.query["sslmode"]})
+    return url
+
+class PoolWaitStats:
+    """Quantas conexões foram entregues pelo pool e quanto tempo se esperou por elas"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float, timed_out: bool) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / attempts * 1000, 3) if attempts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3)
+            }
+
+class _TimedPoolMixin:
+    # Mede o tempo até obter uma conexão (espera na fila + eventual abertura)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.wait_stats.record(time.perf_counter() - start, timed_out)
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+def _is_memory_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+def _engine_options(url: URL, pool_class: type, settings: Settings) -> Dict[str, Any]:
+    """Parâmetros de pool da engine a partir das configurações"""
+    if _is_memory_sqlite(url):
+        # Banco em memória vive numa única conexão; o pool padrão do dialeto é mantido
+        return {}
+    return {
+        "poolclass": pool_class,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+def _sqlite_pragmas(settings: Settings):
+    pragmas = (
+        f"PRAGMA journal_mode={settings.sqlite_journal_mode}",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+        f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}",
+        f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}",
+    )
+
+    def apply(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    return apply
+
+def _configure_sqlite(engine: Engine) -> None:
+    # Pragmas valem por conexão: aplicados a cada conexão nova do pool
+    if engine.dialect.name == "sqlite" and not _is_memory_sqlite(engine.url):
+        event.listen(engine, "connect", _sqlite_pragmas(settings))
+
+def _pool_stats(engine: Engine) -> Dict[str, Any]:
+    pool = engine.pool
+    stats: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": settings.db_max_overflow
+        })
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        stats.update(wait_stats.snapshot())
+    return stats
+
+# Engine síncrona: criação de tabelas, migrações, scripts e código que roda em threads
+engine = create_engine(
+    settings.database_url,
+    **_engine_options(make_url(settings.database_url), TimedQueuePool, settings)
+)
+_configure_sqlite(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine assíncrona: usada pelas rotas, sem bloquear o event loop
+_async_url = async_database_url(settings.database_url)
+async_engine = create_async_engine(_async_url, **_engine_options(_async_url, TimedAsyncQueuePool, settings))
+_configure_sqlite(async_engine.sync_engine)
+
+# expire_on_commit=False: atributos continuam legíveis depois do commit sem novo SELECT
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Estado atual dos pools (conexões em uso, overflow, espera) para dimensionamento"""
+    return {
+        "async": _pool_stats(async_engine.sync_engine),
+        "sync": _pool_stats(engine)
+    }
+
 # Dependency para obter sessão do banco
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dependency para obter sessão assíncrona do banco
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,10 +1,52 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 import os
+import tempfile
 
 class Settings(BaseSettings):
     # API Keys
-    gemini_api_key: str
+    gemini_api_key: str = ""  # Obrigatória com o backend "gemini"
+    
+    # Backend de resumo: "gemini" (produção) ou "stub" (local, sem rede)
+    summarizer_backend: str = "gemini"
+    
+    # Backend stub (testes de carga offline)
+    stub_latency_ms: int = 500
+    stub_latency_jitter_ms: int = 0
+    stub_failure_rate: float = 0.0  # Fração de chamadas com erro definitivo
+    stub_overload_rate: float = 0.0  # Fração de chamadas com erro 503 (com retry)
+    stub_seed: Optional[int] = None
+    
+    # Gemini
+    gemini_model: str = "gemini-1.5-flash"
+    gemini_max_concurrency: int = 16  # Chamadas simultâneas ao Gemini por worker
+    gemini_max_retries: int = 3
+    
+    # Circuit breaker do LLM
+    breaker_enabled: bool = True
+    breaker_window_seconds: float = 60
+    breaker_min_calls: int = 10
+    breaker_error_threshold: float = 0.5  # Taxa de erro que abre o circuito
+    breaker_latency_threshold_seconds: float = 30.0  # Latência média que abre o circuito
+    breaker_open_seconds: float = 30  # Tempo aberto antes de testar (half-open)
+    breaker_half_open_max_calls: int = 1
+    
+    # Resumo em trechos (map-reduce) para textos longos
+    summary_chunking_threshold_chars: int = 12000
+    summary_chunk_size_chars: int = 6000
+    summary_chunk_concurrency: int = 4
+    
+    # Resumo extrativo local
+    extractive_max_words: int = 100
+    extractive_auto_threshold_chars: int = 50000  # Modo "auto" usa extrativo acima disto
+    
+    # Cache de resumos
+    summary_cache_enabled: bool = True
+    summary_cache_max_entries: int = 1024
+    summary_cache_ttl_seconds: int = 3600  # Camada em memória (LRU)
+    summary_cache_db_ttl_days: int = 30  # Camada persistente no banco
+    summary_cache_prune_interval_seconds: int = 3600  # Remoção das entradas expiradas do banco
     
     # App Config
     app_name: str = "AI Text Summarizer"
@@ -13,11 +55,65 @@ class Settings(BaseSettings):
     # Database
     database_url: str = "sqlite:///./summarizer.db"
     
+    # Pool de conexões (por engine, em cada worker)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10  # Conexões extras além de db_pool_size em picos
+    db_pool_timeout_seconds: float = 30  # Espera máxima por uma conexão livre
+    db_pool_recycle_seconds: int = 1800  # Renova conexões mais antigas (proxies/firewalls)
+    db_pool_pre_ping: bool = True  # Testa a conexão antes de entregá-la
+    
+    # SQLite local (aplicado a cada nova conexão)
+    sqlite_journal_mode: str = "WAL"  # Leitores não bloqueiam o escritor
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 268435456  # 256 MB
+    
     # JWT
     secret_key: str = "your-secret-key-here-change-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     
+    # Hash de senhas
+    bcrypt_rounds: int = 12  # Custo do bcrypt (cada +1 dobra o tempo)
+    password_hash_workers: Optional[int] = None  # Threads do bcrypt; padrão: número de CPUs
+    
+    # Cache de autenticação (token verificado → identidade, por processo)
+    auth_cache_enabled: bool = True
+    auth_cache_ttl_seconds: int = 60
+    auth_cache_max_entries: int = 10000
+    
+    # Histórico
+    history_count_cap: int = 1000  # Limite da contagem com count=capped
+    export_batch_size: int = 500  # Linhas lidas do banco por lote na exportação
+    export_chunk_bytes: int = 65536  # Tamanho aproximado de cada pedaço enviado
+    
+    # Resumo em lote
+    batch_max_items: int = 50
+    batch_concurrency: int = 8
+    
+    # Fila de jobs de resumo
+    job_workers: int = 4  # Workers por processo (0 desativa o processamento)
+    job_poll_interval_seconds: float = 1.0
+    job_visibility_timeout_seconds: int = 300
+    job_max_attempts: int = 3
+    job_retry_delay_seconds: int = 10
+    job_retention_hours: int = 168  # Jobs concluídos ou falhos são apagados depois disto
+    
+    # Métricas (Prometheus em /metrics)
+    metrics_enabled: bool = True
+    
+    # Diagnóstico de latência
+    server_timing_enabled: bool = True  # Header Server-Timing com o tempo de cada fase
+    profiling_enabled: bool = False  # Profiler por amostragem (opt-in)
+    profile_sample_rate: float = 0.0  # Fração das requisições perfiladas, além das pedidas pelo header
+    profile_header: str = "X-Profile"
+    profile_secret: str = ""  # Valor exigido no header; vazio desativa o perfil pedido pelo header
+    profile_max_concurrent: int = 1  # Perfis simultâneos (cada um é uma thread de amostragem)
+    profile_max_per_minute: int = 6  # Arquivos de perfil gravados por minuto
+    profile_slow_ms: float = 1000  # Perfis sorteados só são gravados acima disto
+    profile_interval_ms: float = 5
+    profile_dir: str = os.path.join(tempfile.gettempdir(), "resumidor_profiles")
+    
     # Email Configuration
     smtp_server: str = "smtp.gmail.com"
     smtp_port: int = 587
@@ -32,6 +128,10 @@ class Settings(BaseSettings):
     # Rate Limiting
     rate_limit_per_minute: int = 100
     auth_rate_limit_per_minute: int = 50
+    rate_limit_backend: str = "memory"  # memory (por processo) ou sqlite (compartilhado entre workers)
+    rate_limit_sqlite_path: str = os.path.join(tempfile.gettempdir(), "resumidor_rate_limits.sqlite")
+    rate_limit_sweep_seconds: float = 60.0  # Intervalo de limpeza de clientes ociosos
+    rate_limit_sqlite_busy_timeout_ms: int = 50  # Espera máxima pelo lock do arquivo; depois disso a requisição passa
     
     class Config:
         env_file = os.path.join(os.path.dirname(__file__), "../../../.env")
@@ -1,30 +1,61 @@
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from ..config.database import get_db
-from ..services.auth_service import AuthService
-from ..services.user_service import UserService
+from sqlalchemy import select
+from ..config.database import AsyncSessionLocal
 from ..models.database import User
+from ..models.schemas import TokenData
+from ..services.auth_cache import AuthenticatedUser, auth_cache
+from ..services.auth_service import AuthService
+from ..services.request_timing import phase, timed
 
 security = HTTPBearer()
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Dependency para obter usuário atual autenticado"""
+@timed("user")
+async def _load_identity(token_data: TokenData) -> Optional[AuthenticatedUser]:
+    """Busca o usuário do token no banco
+    
+    Tokens emitidos antes da última troca de senha (claim cv diferente de
+    users.credential_version) não encontram o usuário.
+    """
+    query = select(User.id, User.email, User.username, User.name, User.created_at).where(
+        User.credential_version == token_data.credential_version
+    )
+    if token_data.user_id is not None:
+        # Claim uid: busca pela chave primária, conferindo o email do token
+        query = query.where(User.id == token_data.user_id, User.email == token_data.email)
+    else:
+        query = query.where(User.email == token_data.email)
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(query)).first()
+    return AuthenticatedUser(*row) if row else None
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> AuthenticatedUser:
+    """Dependency para obter usuário atual autenticado
+    
+    Tokens já verificados vêm do cache em memória, sem acesso ao banco.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    token_data = AuthService.verify_token(credentials.credentials)
+    token = credentials.credentials
+    user = auth_cache.get(token)
+    if user is not None:
+        return user
+    
+    with phase("jwt"):
+        token_data = AuthService.verify_token(token)
     if token_data is None or token_data.email is None:
         raise credentials_exception
     
-    user = UserService.get_user_by_email(db, email=token_data.email)
+    user = await _load_identity(token_data)
     if user is None:
         raise credentials_exception
     
-    return user
\ No newline at end of file
+    auth_cache.set(token, user, token_expires_at=token_data.expires_at)
+    return user
@@ -1,11 +1,19 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import resumo, auth, health
+from .routers import resumo, auth, health, jobs, metrics
 from .config.settings import get_settings
-from .config.database import engine
+from .config.database import engine, async_engine
 from .config.logging import setup_logging, get_logger
-from .middleware.rate_limit import RateLimitMiddleware, AuthenticatedRateLimitMiddleware
-from .models.database import Base
+from .middleware.metrics import MetricsMiddleware
+from .middleware.profiling import ProfilingMiddleware
+from .middleware.rate_limit import RateLimitMiddleware
+from .middleware.server_timing import ServerTimingMiddleware
+from .services.rate_limiter import get_rate_limit_store
+from .models.database import Base, ensure_indexes
+from .models.migrations import run_migrations
+from .services.auth_service import password_executor
+from .services.search_index import search_index
+from .services.metrics import instrument_engine
 import logging.config
 
 settings = get_settings()
@@ -16,6 +24,9 @@ logger = get_logger("main")
 
 # Criar tabelas do banco de dados
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
+ensure_indexes(engine)
+search_index.ensure_schema(engine)
 logger.info("Tabelas do banco de dados criadas/verificadas")
 
 app = FastAPI(
@@ -47,16 +58,60 @@ app.add_middleware(
 
 # Rate limiting em produção
 if not settings.debug:
-    # Rate limit geral baseado nas configurações
-    app.add_middleware(RateLimitMiddleware, calls=settings.rate_limit_per_minute, period=60)
-    # Rate limit para endpoints autenticados baseado nas configurações
-    app.add_middleware(AuthenticatedRateLimitMiddleware, calls=settings.auth_rate_limit_per_minute, period=60)
+    # Limites por IP e por token numa única passagem; estado em memória ou
+    # compartilhado entre workers (RATE_LIMIT_BACKEND)
+    app.add_middleware(
+        RateLimitMiddleware,
+        calls=settings.rate_limit_per_minute,
+        period=60,
+        auth_calls=settings.auth_rate_limit_per_minute,
+        auth_period=60,
+        store=get_rate_limit_store(settings)
+    )
     logger.info(f"Rate limiting ativado para produção: {settings.rate_limit_per_minute}/min geral, {settings.auth_rate_limit_per_minute}/min autenticado")
 
+# Diagnóstico por requisição (fases no Server-Timing e profiler opt-in)
+if settings.profiling_enabled:
+    app.add_middleware(
+        ProfilingMiddleware,
+        sample_rate=settings.profile_sample_rate,
+        header=settings.profile_header,
+        secret=settings.profile_secret,
+        max_concurrent=settings.profile_max_concurrent,
+        max_per_minute=settings.profile_max_per_minute,
+        slow_ms=settings.profile_slow_ms,
+        interval_ms=settings.profile_interval_ms,
+        directory=settings.profile_dir
+    )
+    logger.info(f"Profiler ativado: header {settings.profile_header}, amostragem {settings.profile_sample_rate}, perfis em {settings.profile_dir}")
+if settings.server_timing_enabled:
+    app.add_middleware(ServerTimingMiddleware)
+
+# Métricas: adicionado por último para envolver os demais middlewares
+# (requisições rejeitadas pelo rate limit também são medidas)
+if settings.metrics_enabled:
+    instrument_engine(engine, "sync")
+    instrument_engine(async_engine.sync_engine, "async")
+    app.add_middleware(MetricsMiddleware)
+
 # Incluir rotas
 app.include_router(auth.router)
 app.include_router(resumo.router)
+app.include_router(jobs.router)
 app.include_router(health.router)
+if settings.metrics_enabled:
+    app.include_router(metrics.router)
+
+@app.on_event("startup")
+async def start_services():
+    jobs.job_workers.start()
+
+@app.on_event("shutdown")
+async def shutdown_services():
+    await jobs.job_workers.stop()
+    resumo.gemini_service.shutdown()
+    password_executor.shutdown(wait=False, cancel_futures=True)
+    await async_engine.dispose()
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,38 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import time
+from ..services.metrics import HTTP_LATENCY, HTTP_REQUESTS
+
+class MetricsMiddleware:
+    """
+    Latência e contagem de status por rota, em ASGI puro.
+
+    A rota é o template do FastAPI (ex.: /api/historico/{summary_id}), para
+    que ids não multipliquem as séries; requisições que não chegaram a uma
+    rota (404, 429 do rate limit) ficam em "unmatched".
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # O roteador preenche scope["route"] no mesmo dicionário
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            HTTP_REQUESTS.inc(scope["method"], path, str(status_code))
+            HTTP_LATENCY.observe(time.perf_counter() - started, scope["method"], path)
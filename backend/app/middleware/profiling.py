@@ -0,0 +1,90 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+from collections import deque
+import asyncio
+import hmac
+import random
+import time
+from ..config.logging import get_logger
+from ..services.profiler import StackSampler, write_profile
+
+logger = get_logger("profiling")
+
+class ProfilingMiddleware:
+    """
+    Profiler por amostragem, opt-in (PROFILING_ENABLED).
+
+    Uma requisição é perfilada quando traz o header configurado com o
+    segredo como valor (ex.: "X-Profile: <PROFILE_SECRET>") ou é sorteada
+    por sample_rate. Sem segredo configurado, o header é ignorado. Perfis
+    pedidos pelo header são sempre gravados; os sorteados, só se a
+    requisição levou pelo menos slow_ms. Os arquivos .folded vão para
+    `directory`.
+
+    No máximo max_concurrent perfis rodam ao mesmo tempo e no máximo
+    max_per_minute arquivos são gravados por minuto; além disso a
+    requisição segue sem profiler.
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 0.0, header: str = "x-profile", secret: str = "",
+                 max_concurrent: int = 1, max_per_minute: int = 6, slow_ms: float = 1000,
+                 interval_ms: float = 5, directory: str = "profiles"):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.header = header.lower().encode("latin-1")
+        self.secret = secret.encode("latin-1")
+        self.max_concurrent = max_concurrent
+        self.max_per_minute = max_per_minute
+        self.slow_ms = slow_ms
+        self.interval = interval_ms / 1000
+        self.directory = directory
+        # Estado só tocado no event loop: sem lock
+        self._active = 0
+        self._written = deque()  # Instantes das gravações no último minuto
+
+    def _requested(self, scope: Scope) -> bool:
+        if not self.secret:
+            return False
+        for name, value in scope["headers"]:
+            if name == self.header:
+                return hmac.compare_digest(value.strip(), self.secret)
+        return False
+
+    def _has_budget(self) -> bool:
+        now = time.monotonic()
+        while self._written and now - self._written[0] >= 60:
+            self._written.popleft()
+        return self._active < self.max_concurrent and len(self._written) < self.max_per_minute
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        requested = self._requested(scope)
+        if not requested and not (self.sample_rate > 0 and random.random() < self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+        if not self._has_budget():
+            logger.debug(f"Limite de perfis atingido, {scope['method']} {scope['path']} segue sem profiler")
+            await self.app(scope, receive, send)
+            return
+
+        self._active += 1
+        sampler = StackSampler(self.interval)
+        sampler.start()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            sampler.stop()
+            self._active -= 1
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if requested or elapsed_ms >= self.slow_ms:
+                self._written.append(time.monotonic())
+                loop = asyncio.get_running_loop()
+                try:
+                    await loop.run_in_executor(
+                        None, write_profile, self.directory, scope["method"], scope["path"], elapsed_ms, sampler
+                    )
+                except OSError as e:
+                    logger.warning(f"Falha ao gravar perfil: {e}")
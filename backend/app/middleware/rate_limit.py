@@ -1,156 +1,150 @@
-from fastapi import Request, HTTPException, status
+from fastapi import status
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from typing import Dict, Tuple
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Dict, Iterable, Optional
+import asyncio
+import hashlib
+import math
+import re
 import time
-from collections import defaultdict, deque
 from ..config.logging import get_logger
+from ..services.metrics import RATE_LIMIT_REJECTIONS
+from ..services.rate_limiter import MemoryRateLimitStore, RateLimitResult, RateLimitStore
 
 logger = get_logger("rate_limit")
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+# Endpoints que requerem autenticação, com limite próprio (mais restritivo)
+PROTECTED_PATHS = (
+    "/api/resumir-texto",
+    "/api/resumir-lote",
+    "/api/historico",
+    "/api/jobs",
+    "/api/auth/me",
+)
+
+EXEMPT_PATHS = ("/api/health", "/metrics")
+
+def _prefix_pattern(prefixes: Iterable[str]) -> "re.Pattern[str]":
+    # Uma única regex para todos os prefixos, compilada uma vez
+    return re.compile("|".join(re.escape(prefix) for prefix in prefixes))
+
+class RateLimitMiddleware:
     """
-    Middleware para rate limiting baseado em IP.
+    Rate limiting em ASGI puro, numa única passagem por requisição.
+
+    Aplica o limite geral por IP e, nos endpoints protegidos, o limite por
+    token (ou IP, sem token). O corpo da resposta nunca é tocado: só os
+    headers X-RateLimit-* são acrescentados à mensagem http.response.start,
+    então streaming (SSE, exportação) passa direto.
     """
-    
-    def __init__(self, app, calls: int = 100, period: int = 60):
-        super().__init__(app)
-        self.calls = calls  # Número máximo de chamadas
+
+    def __init__(self, app: ASGIApp, calls: int = 100, period: int = 60, auth_calls: int = 50,
+                 auth_period: int = 60, store: Optional[RateLimitStore] = None,
+                 protected_paths: Iterable[str] = PROTECTED_PATHS, exempt_paths: Iterable[str] = EXEMPT_PATHS):
+        self.app = app
+        self.calls = calls  # Número máximo de chamadas por IP
         self.period = period  # Período em segundos
-        self.clients: Dict[str, deque] = defaultdict(deque)
-    
-    def _get_client_ip(self, request: Request) -> str:
-        """
-        Extrai o IP do cliente, considerando proxies.
-        """
-        # Verificar headers de proxy
-        forwarded_for = request.headers.get("X-Forwarded-For")
+        self.auth_calls = auth_calls
+        self.auth_period = auth_period
+        self.store = store or MemoryRateLimitStore()
+        self._protected = _prefix_pattern(protected_paths)
+        self._exempt = _prefix_pattern(exempt_paths)
+
+    @staticmethod
+    def _headers(scope: Scope) -> Dict[bytes, bytes]:
+        # Só os headers usados aqui; a primeira ocorrência vale
+        wanted = {}
+        for name, value in scope["headers"]:
+            if name in (b"x-forwarded-for", b"x-real-ip", b"authorization") and name not in wanted:
+                wanted[name] = value
+        return wanted
+
+    @staticmethod
+    def _client_ip(scope: Scope, headers: Dict[bytes, bytes]) -> str:
+        """Extrai o IP do cliente, considerando proxies"""
+        forwarded_for = headers.get(b"x-forwarded-for")
         if forwarded_for:
-            return forwarded_for.split(",")[0].strip()
-        
-        real_ip = request.headers.get("X-Real-IP")
+            return forwarded_for.decode("latin-1").split(",")[0].strip()
+
+        real_ip = headers.get(b"x-real-ip")
         if real_ip:
-            return real_ip
-        
-        # Fallback para IP direto
-        return request.client.host if request.client else "unknown"
-    
-    def _is_rate_limited(self, client_ip: str) -> Tuple[bool, int]:
-        """
-        Verifica se o cliente excedeu o rate limit.
-        Retorna (is_limited, remaining_calls)
-        """
-        now = time.time()
-        client_calls = self.clients[client_ip]
-        
-        # Remove chamadas antigas (fora do período)
-        while client_calls and client_calls[0] <= now - self.period:
-            client_calls.popleft()
-        
-        # Verifica se excedeu o limite
-        if len(client_calls) >= self.calls:
-            return True, 0
-        
-        # Adiciona a chamada atual
-        client_calls.append(now)
-        remaining = self.calls - len(client_calls)
-        
-        return False, remaining
-    
-    async def dispatch(self, request: Request, call_next):
-        # Pular rate limiting para health checks
-        if request.url.path.startswith("/api/health"):
-            return await call_next(request)
-        
-        client_ip = self._get_client_ip(request)
-        is_limited, remaining = self._is_rate_limited(client_ip)
-        
-        if is_limited:
+            return real_ip.decode("latin-1")
+
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    @staticmethod
+    def _auth_identifier(client_ip: str, headers: Dict[bytes, bytes]) -> str:
+        """Usa o token JWT ou IP como identificador"""
+        authorization = headers.get(b"authorization", b"")
+        if authorization.startswith(b"Bearer "):
+            # Hash estável do token (hash() muda a cada processo; o estado pode ser compartilhado)
+            return f"token_{hashlib.sha256(authorization[7:]).hexdigest()[:32]}"
+        return f"ip_{client_ip}"
+
+    async def _hit(self, key: str, limit: int, period: float) -> RateLimitResult:
+        if self.store.blocking:
+            # Armazenamento com I/O (arquivo compartilhado): fora do event loop
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self.store.hit, key, limit, period)
+        return self.store.hit(key, limit, period)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._exempt.match(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        headers = self._headers(scope)
+        client_ip = self._client_ip(scope, headers)
+
+        if self._protected.match(scope["path"]):
+            client_id = self._auth_identifier(client_ip, headers)
+            result = await self._hit(f"auth:{client_id}", self.auth_calls, self.auth_period)
+            if not result.allowed:
+                logger.warning(f"Authenticated rate limit exceeded for: {client_id}")
+                RATE_LIMIT_REJECTIONS.inc("auth")
+                response = JSONResponse(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    content={
+                        "error": "Rate limit exceeded",
+                        "message": f"Too many requests to protected endpoints. Limit: {self.auth_calls} per {self.auth_period} seconds"
+                    }
+                )
+                await response(scope, receive, send)
+                return
+
+        result = await self._hit(f"ip:{client_ip}", self.calls, self.period)
+        if not result.allowed:
+            retry_after = math.ceil(result.retry_after)
             logger.warning(f"Rate limit exceeded for IP: {client_ip}")
-            return JSONResponse(
+            RATE_LIMIT_REJECTIONS.inc("ip")
+            response = JSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 content={
                     "error": "Rate limit exceeded",
                     "message": f"Too many requests. Limit: {self.calls} per {self.period} seconds",
-                    "retry_after": self.period
+                    "retry_after": retry_after
                 },
                 headers={
                     "X-RateLimit-Limit": str(self.calls),
                     "X-RateLimit-Remaining": "0",
-                    "X-RateLimit-Reset": str(int(time.time() + self.period)),
-                    "Retry-After": str(self.period)
+                    "X-RateLimit-Reset": str(int(time.time() + retry_after)),
+                    "Retry-After": str(retry_after)
                 }
             )
-        
-        # Processar a requisição
-        response = await call_next(request)
-        
-        # Adicionar headers de rate limit
-        response.headers["X-RateLimit-Limit"] = str(self.calls)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-        response.headers["X-RateLimit-Reset"] = str(int(time.time() + self.period))
-        
-        return response
-
-class AuthenticatedRateLimitMiddleware(BaseHTTPMiddleware):
-    """
-    Rate limiting mais restritivo para endpoints autenticados.
-    """
-    
-    def __init__(self, app, calls: int = 50, period: int = 60):
-        super().__init__(app)
-        self.calls = calls
-        self.period = period
-        self.clients: Dict[str, deque] = defaultdict(deque)
-    
-    def _get_client_identifier(self, request: Request) -> str:
-        """
-        Usa o token JWT ou IP como identificador.
-        """
-        auth_header = request.headers.get("Authorization")
-        if auth_header and auth_header.startswith("Bearer "):
-            # Usar hash do token como identificador
-            token = auth_header.split(" ")[1]
-            return f"token_{hash(token)}"
-        
-        # Fallback para IP
-        forwarded_for = request.headers.get("X-Forwarded-For")
-        if forwarded_for:
-            return f"ip_{forwarded_for.split(',')[0].strip()}"
-        
-        return f"ip_{request.client.host if request.client else 'unknown'}"
-    
-    async def dispatch(self, request: Request, call_next):
-        # Aplicar apenas em endpoints que requerem autenticação
-        protected_paths = [
-            "/api/resumir-texto",
-            "/api/historico",
-            "/api/auth/me"
+            await response(scope, receive, send)
+            return
+
+        rate_headers = [
+            (b"x-ratelimit-limit", str(self.calls).encode()),
+            (b"x-ratelimit-remaining", str(result.remaining).encode()),
+            (b"x-ratelimit-reset", str(int(time.time() + result.reset_after)).encode()),
         ]
-        
-        if not any(request.url.path.startswith(path) for path in protected_paths):
-            return await call_next(request)
-        
-        client_id = self._get_client_identifier(request)
-        now = time.time()
-        client_calls = self.clients[client_id]
-        
-        # Remove chamadas antigas
-        while client_calls and client_calls[0] <= now - self.period:
-            client_calls.popleft()
-        
-        # Verifica limite
-        if len(client_calls) >= self.calls:
-            logger.warning(f"Authenticated rate limit exceeded for: {client_id}")
-            return JSONResponse(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                content={
-                    "error": "Rate limit exceeded",
-                    "message": f"Too many requests to protected endpoints. Limit: {self.calls} per {self.period} seconds"
-                }
-            )
-        
-        # Adiciona chamada atual
-        client_calls.append(now)
-        
-        return await call_next(request)
\ No newline at end of file
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).raw.extend(rate_headers)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
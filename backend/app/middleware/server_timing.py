@@ -0,0 +1,34 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import time
+from ..services.request_timing import end_request, start_request
+
+class ServerTimingMiddleware:
+    """
+    Envia o tempo gasto em cada fase da requisição no header Server-Timing
+    (ex.: "jwt;dur=0.3, user;dur=1.8, llm;dur=812.4, db;dur=6.1, total;dur=823.0").
+
+    As fases são medidas com services.request_timing.phase/timed; só entra
+    no header o que terminou antes do início da resposta.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing, token = start_request()
+        started = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("Server-Timing", timing.server_timing(time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_request(token)
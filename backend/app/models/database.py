@@ -1,8 +1,24 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+import hashlib
+import zlib
+from sqlalchemy import Column, Integer, LargeBinary, String, Text, DateTime, ForeignKey, Index, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.config.database import Base
 
+# Tamanho da prévia do texto original exibida na listagem do histórico
+SUMMARY_PREVIEW_CHARS = 200
+
+def make_preview(texto: str) -> str:
+    """Prévia de tamanho fixo do texto original (espaços normalizados)"""
+    # Só o começo do texto é lido, mesmo para textos enormes
+    inicio = texto[:SUMMARY_PREVIEW_CHARS * 4]
+    compacto = " ".join(inicio.split())
+    if len(compacto) <= SUMMARY_PREVIEW_CHARS and len(inicio) == len(texto):
+        return compacto
+    return compacto[:SUMMARY_PREVIEW_CHARS].rstrip() + "…"
+
 class User(Base):
     __tablename__ = "users"
     
@@ -12,21 +28,98 @@ class User(Base):
     name = Column(String(255), nullable=True)
     hashed_password = Column(String(255), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Total de resumos, mantido por UserService (evita COUNT(*) no histórico)
+    summary_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Incrementada a cada troca de senha; tokens emitidos antes (claim "cv") deixam de valer
+    credential_version = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Relacionamento com resumos
     summaries = relationship("Summary", back_populates="user")
 
+class TextBlob(Base):
+    """
+    Texto comprimido (zlib) e endereçado pelo conteúdo: a chave é o SHA-256
+    do texto, então textos repetidos são gravados uma única vez.
+    """
+    __tablename__ = "text_blobs"
+    
+    hash = Column(String(64), primary_key=True)
+    data = Column(LargeBinary, nullable=False)
+    size = Column(Integer, nullable=False)  # Bytes do texto sem compressão
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    @staticmethod
+    def hash_text(texto: str) -> str:
+        return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def compress(texto: str) -> bytes:
+        return zlib.compress(texto.encode("utf-8"), 6)
+    
+    @staticmethod
+    def decompress(data: bytes) -> str:
+        return zlib.decompress(data).decode("utf-8")
+    
+    @property
+    def text(self) -> str:
+        return self.decompress(self.data)
+    
+    @staticmethod
+    async def store(db: AsyncSession, texto: str) -> str:
+        """Grava o texto se ainda não existir (sem commit) e devolve o hash
+        
+        No PostgreSQL a linha fica travada (FOR KEY SHARE) até o commit de
+        quem chama, para que a limpeza de textos sem referência
+        (UserService.delete_user_summary) não a apague antes de o novo
+        resumo ser gravado. No SQLite o insert já segura o lock de escrita
+        do banco até o commit.
+        """
+        digest = TextBlob.hash_text(texto)
+        values = {"hash": digest, "data": TextBlob.compress(texto), "size": len(texto.encode("utf-8"))}
+        dialect = db.bind.dialect.name
+        if dialect == "postgresql":
+            while True:
+                # ON CONFLICT DO NOTHING não trava a linha existente
+                await db.execute(postgresql.insert(TextBlob).values(**values).on_conflict_do_nothing(index_elements=["hash"]))
+                locked = await db.scalar(
+                    select(TextBlob.hash).where(TextBlob.hash == digest).with_for_update(read=True, key_share=True)
+                )
+                if locked is not None:
+                    break
+                # Apagada por uma limpeza concorrente entre o insert e o lock: grava de novo
+        elif dialect == "sqlite":
+            await db.execute(sqlite.insert(TextBlob).values(**values).on_conflict_do_nothing(index_elements=["hash"]))
+        elif await db.scalar(select(TextBlob.hash).where(TextBlob.hash == digest)) is None:
+            await db.execute(insert(TextBlob).values(**values))
+        return digest
+
 class Summary(Base):
     __tablename__ = "summaries"
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    original_text = Column(Text, nullable=False)
+    # Texto original fica em text_blobs (comprimido e sem duplicatas)
+    original_hash = Column(String(64), ForeignKey("text_blobs.hash"), nullable=False, index=True)
     summary_text = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Calculados na inserção: a listagem do histórico não lê original_text
+    original_preview = Column(String(SUMMARY_PREVIEW_CHARS + 1), nullable=True)
+    original_words = Column(Integer, nullable=True)
     
     # Relacionamento com usuário
     user = relationship("User", back_populates="summaries")
+    original_blob = relationship("TextBlob")
+    
+    @property
+    def original_text(self) -> str:
+        """Texto original, descomprimido sob demanda"""
+        return self.original_blob.text
+    
+    __table_args__ = (
+        # Atende a listagem do histórico (filtro por usuário, mais recentes primeiro)
+        # e a paginação por cursor em (created_at, id)
+        Index("ix_summaries_user_created_id", "user_id", created_at.desc(), id.desc()),
+    )
 
 class PasswordResetToken(Base):
     __tablename__ = "password_reset_tokens"
@@ -39,4 +132,36 @@ class PasswordResetToken(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relacionamento com usuário
-    user = relationship("User")
\ No newline at end of file
+    user = relationship("User")
+
+class CachedSummary(Base):
+    __tablename__ = "summary_cache"
+    
+    # sha256 do texto normalizado + versão do prompt/modelo
+    key = Column(String(64), primary_key=True)
+    summary_text = Column(Text, nullable=False)
+    # Indexado para a limpeza periódica de entradas expiradas
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+class SummaryJob(Base):
+    __tablename__ = "summary_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    # Só enquanto o job está na fila: esvaziado ao concluir (o texto passa a ficar no resumo) ou falhar
+    original_text = Column(Text, nullable=False)
+    modo = Column(String(20), nullable=False, default="abstrativo")
+    status = Column(String(20), nullable=False, default="pending", index=True)  # pending, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    # Job invisível para outros workers até este instante (timeout de visibilidade / espera entre tentativas)
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+    summary_id = Column(Integer, ForeignKey("summaries.id"), nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+def ensure_indexes(bind) -> None:
+    """Cria índices declarados depois da criação das tabelas (create_all não os adiciona)"""
+    for model_table in Base.metadata.sorted_tables:
+        for index in model_table.indexes:
+            index.create(bind=bind, checkfirst=True)
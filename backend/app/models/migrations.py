@@ -0,0 +1,101 @@
+from typing import Callable, Union
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from ..config.logging import get_logger
+from .database import TextBlob, make_preview
+
+logger = get_logger("migrations")
+
+def _has_column(bind: Engine, table: str, column: str) -> bool:
+    return column in {col["name"] for col in inspect(bind).get_columns(table)}
+
+def _add_column(bind: Engine, table: str, column: str, ddl: str,
+                backfill: Union[str, Callable[[Connection], None]] = None) -> None:
+    """Adiciona a coluna (e preenche os dados) se ela ainda não existir
+    
+    backfill pode ser um UPDATE em SQL ou uma função que recebe a conexão.
+    """
+    if _has_column(bind, table, column):
+        return
+    with bind.begin() as conn:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+        if callable(backfill):
+            backfill(conn)
+        elif backfill:
+            conn.execute(text(backfill))
+    logger.info(f"Migração aplicada: {table}.{column}")
+
+def _backfill_previews(conn: Connection, batch_size: int = 500) -> None:
+    # Prévia e contagem de palavras precisam do texto em Python; lotes por id
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            text("SELECT id, original_text FROM summaries WHERE id > :last_id ORDER BY id LIMIT :limit"),
+            {"last_id": last_id, "limit": batch_size}
+        ).fetchall()
+        if not rows:
+            return
+        conn.execute(
+            text("UPDATE summaries SET original_preview = :preview, original_words = :words WHERE id = :id"),
+            [{"id": row.id, "preview": make_preview(row.original_text), "words": len(row.original_text.split())}
+             for row in rows]
+        )
+        last_id = rows[-1].id
+
+def _migrate_original_texts(bind: Engine, batch_size: int = 500) -> None:
+    """Move summaries.original_text para text_blobs (comprimido, sem duplicatas)"""
+    if not _has_column(bind, "summaries", "original_text"):
+        return
+    if not _has_column(bind, "summaries", "original_hash"):
+        with bind.begin() as conn:
+            conn.execute(text("ALTER TABLE summaries ADD COLUMN original_hash VARCHAR(64) REFERENCES text_blobs(hash)"))
+
+    moved = 0
+    with bind.begin() as conn:
+        while True:
+            rows = conn.execute(
+                text("SELECT id, original_text FROM summaries WHERE original_hash IS NULL ORDER BY id LIMIT :limit"),
+                {"limit": batch_size}
+            ).fetchall()
+            if not rows:
+                break
+            hashes = {row.id: TextBlob.hash_text(row.original_text) for row in rows}
+            blobs = {hashes[row.id]: row.original_text for row in rows}
+            existing = {
+                found[0] for found in conn.execute(
+                    TextBlob.__table__.select().with_only_columns(TextBlob.hash).where(TextBlob.hash.in_(list(blobs)))
+                )
+            }
+            new_blobs = [
+                {"hash": digest, "data": TextBlob.compress(texto), "size": len(texto.encode("utf-8"))}
+                for digest, texto in blobs.items() if digest not in existing
+            ]
+            if new_blobs:
+                conn.execute(TextBlob.__table__.insert(), new_blobs)
+            conn.execute(
+                text("UPDATE summaries SET original_hash = :hash WHERE id = :id"),
+                [{"id": summary_id, "hash": digest} for summary_id, digest in hashes.items()]
+            )
+            moved += len(rows)
+        conn.execute(text("ALTER TABLE summaries DROP COLUMN original_text"))
+    logger.info(f"Migração aplicada: {moved} textos originais movidos para text_blobs")
+
+def run_migrations(bind: Engine) -> None:
+    """
+    Ajustes de esquema em bancos criados por versões anteriores.
+    create_all só cria tabelas novas; colunas novas em tabelas existentes
+    são adicionadas aqui, de forma idempotente.
+    """
+    _add_column(bind, "summary_jobs", "modo", "VARCHAR(20) NOT NULL DEFAULT 'abstrativo'")
+    _add_column(
+        bind, "users", "summary_count", "INTEGER NOT NULL DEFAULT 0",
+        backfill=(
+            "UPDATE users SET summary_count = "
+            "(SELECT COUNT(*) FROM summaries WHERE summaries.user_id = users.id)"
+        )
+    )
+    _add_column(bind, "summaries", "original_words", "INTEGER")
+    _add_column(bind, "users", "credential_version", "INTEGER NOT NULL DEFAULT 0")
+    _add_column(bind, "summaries", "original_preview", "VARCHAR(201)", backfill=_backfill_previews)
+    # Depois da prévia, que ainda lê summaries.original_text
+    _migrate_original_texts(bind)
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 # Schemas de Autenticação
 class UserCreate(BaseModel):
@@ -28,6 +28,9 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     email: Optional[str] = None
+    user_id: Optional[int] = None  # Claim "uid"; ausente em tokens antigos
+    expires_at: Optional[float] = None  # Claim "exp" (timestamp)
+    credential_version: int = 0  # Claim "cv"; ausente (0) em tokens antigos
 
 # Schemas de Recuperação de Senha
 class ForgotPasswordRequest(BaseModel):
@@ -41,14 +44,41 @@ class MessageResponse(BaseModel):
     message: str
 
 # Schemas de Resumo
+# abstrativo: LLM; extrativo: frases do próprio texto, calculado localmente;
+# auto: extrativo para textos longos ou quando o LLM está indisponível
+ModoResumo = Literal["abstrativo", "extrativo", "auto"]
+
 class ResumoRequest(BaseModel):
     texto_a_resumir: str
+    modo: ModoResumo = "abstrativo"
 
 class ResumoResponse(BaseModel):
     id: int
     resumo: str
     created_at: datetime
     status: str = "success"
+    modo_usado: str = "abstrativo"  # abstrativo ou extrativo
+    degradado: bool = False  # Extrativo no lugar do LLM indisponível
+
+class ResumoLoteRequest(BaseModel):
+    textos: List[str] = Field(..., min_length=1)
+    modo: ModoResumo = "abstrativo"
+
+class ResumoLoteItem(BaseModel):
+    indice: int  # Posição do texto na requisição
+    status: str  # "success" ou "error"
+    id: Optional[int] = None
+    resumo: Optional[str] = None
+    created_at: Optional[datetime] = None
+    modo_usado: Optional[str] = None
+    degradado: bool = False
+    error: Optional[str] = None
+
+class ResumoLoteResponse(BaseModel):
+    items: List[ResumoLoteItem]
+    total: int
+    sucesso: int
+    falhas: int
 
 class SummaryHistory(BaseModel):
     id: int
@@ -59,11 +89,38 @@ class SummaryHistory(BaseModel):
     class Config:
         from_attributes = True
 
+class SummaryListItem(BaseModel):
+    """Item da listagem do histórico: prévia no lugar do texto original completo"""
+    id: int
+    original_preview: str
+    original_words: int
+    summary_text: str
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
 class UserWithSummaries(User):
     summaries: List[SummaryHistory] = []
 
 class PaginatedSummaryResponse(BaseModel):
-    items: List[SummaryHistory]
-    total: int
+    items: List[SummaryListItem]
+    total: Optional[int]  # None quando count=none
     skip: int
-    limit: int
\ No newline at end of file
+    limit: int
+    has_more: bool = False
+    total_capped: bool = False  # total é um limite inferior (count=capped)
+    next_cursor: Optional[str] = None  # Passar em ?cursor= para a próxima página
+
+# Schemas de Jobs de Resumo
+class JobResponse(BaseModel):
+    id: int
+    status: str
+    attempts: int
+    summary_id: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
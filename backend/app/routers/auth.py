@@ -1,30 +1,32 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from ..config.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config.database import get_async_db
 from ..models.schemas import UserCreate, UserLogin, Token, User, ForgotPasswordRequest, ResetPasswordRequest, MessageResponse
 from ..services.auth_service import AuthService
 from ..services.user_service import UserService
 from ..services.password_reset_service import PasswordResetService
 from ..config.settings import get_settings
 from ..dependencies.auth import get_current_user
+from ..services.auth_cache import AuthenticatedUser
 
 settings = get_settings()
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
 
 @router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Registra um novo usuário"""
     # Verifica se usuário já existe
-    existing_user = UserService.get_user_by_email(db, user_data.email)
+    existing_user = await UserService.get_user_by_email(db, user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    # Cria novo usuário
-    user = UserService.create_user(db, user_data)
+    # Cria novo usuário (bcrypt no pool dedicado, fora do event loop)
+    hashed_password = await AuthService.get_password_hash_async(user_data.password)
+    user = await UserService.create_user(db, user_data, hashed_password=hashed_password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -34,9 +36,9 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     return user
 
 @router.post("/login", response_model=Token)
-async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(user_credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """Autentica usuário e retorna token JWT"""
-    user = AuthService.authenticate_user(db, user_credentials.email, user_credentials.password)
+    user = await AuthService.authenticate_user(db, user_credentials.email, user_credentials.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -46,27 +48,28 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = AuthService.create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": user.email, "uid": user.id, "cv": user.credential_version},
+        expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=User)
-async def read_users_me(current_user: User = Depends(get_current_user)):
+async def read_users_me(current_user: AuthenticatedUser = Depends(get_current_user)):
     """Retorna informações do usuário atual"""
     return current_user
 
 @router.post("/forgot-password", response_model=MessageResponse)
-async def forgot_password(request: ForgotPasswordRequest, db: Session = Depends(get_db)):
+async def forgot_password(request: ForgotPasswordRequest, db: AsyncSession = Depends(get_async_db)):
     """Solicita recuperação de senha"""
     # Sempre retorna sucesso por segurança (não revela se email existe)
-    PasswordResetService.send_reset_email(db, request.email)
+    await PasswordResetService.send_reset_email(db, request.email)
     return {"message": "Se o email estiver cadastrado, você receberá as instruções de recuperação."}
 
 @router.post("/reset-password", response_model=MessageResponse)
-async def reset_password(request: ResetPasswordRequest, db: Session = Depends(get_db)):
+async def reset_password(request: ResetPasswordRequest, db: AsyncSession = Depends(get_async_db)):
     """Redefine a senha usando o token"""
-    success = PasswordResetService.reset_password(db, request.token, request.new_password)
+    success = await PasswordResetService.reset_password(db, request.token, request.new_password)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -75,9 +78,9 @@ async def reset_password(request: ResetPasswordRequest, db: Session = Depends(ge
     return {"message": "Senha redefinida com sucesso!"}
 
 @router.get("/validate-reset-token/{token}")
-async def validate_reset_token(token: str, db: Session = Depends(get_db)):
+async def validate_reset_token(token: str, db: AsyncSession = Depends(get_async_db)):
     """Valida se o token de recuperação é válido"""
-    user = PasswordResetService.validate_reset_token(db, token)
+    user = await PasswordResetService.validate_reset_token(db, token)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
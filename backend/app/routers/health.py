@@ -1,8 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from ..config.database import get_db
+from ..config.database import get_async_db, pool_stats
 from ..config.settings import get_settings
+from ..services.summary_cache import summary_cache
+from ..services.auth_cache import auth_cache
+from ..services.circuit_breaker import FALLBACK_SUMMARY
+from .resumo import gemini_service
 import os
 import datetime
 
@@ -23,7 +27,7 @@ async def health_check():
     }
 
 @router.get("/detailed")
-async def detailed_health_check(db: Session = Depends(get_db)):
+async def detailed_health_check(db: AsyncSession = Depends(get_async_db)):
     """Health check detalhado com verificação de dependências"""
     health_status = {
         "status": "healthy",
@@ -31,21 +35,29 @@ async def detailed_health_check(db: Session = Depends(get_db)):
         "version": "2.0.0",
         "checks": {
             "database": "unknown",
+            "summarizer_backend": settings.summarizer_backend,
             "gemini_api": "unknown",
+            "gemini_circuit": gemini_service.breaker.state,
             "email_config": "unknown"
-        }
+        },
+        "summary_cache": summary_cache.stats(),
+        "auth_cache": auth_cache.stats(),
+        "database_pool": pool_stats(),
+        "summarizer": gemini_service.stats()
     }
     
     # Verificar conexão com banco de dados
     try:
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         health_status["checks"]["database"] = "healthy"
     except Exception as e:
         health_status["checks"]["database"] = f"unhealthy: {str(e)}"
         health_status["status"] = "degraded"
     
     # Verificar configuração da API Gemini
-    if settings.gemini_api_key and settings.gemini_api_key != "your_gemini_api_key_here":
+    if settings.summarizer_backend != "gemini":
+        health_status["checks"]["gemini_api"] = "not_used"
+    elif settings.gemini_api_key and settings.gemini_api_key != "your_gemini_api_key_here":
         health_status["checks"]["gemini_api"] = "configured"
     else:
         health_status["checks"]["gemini_api"] = "not_configured"
@@ -71,14 +83,16 @@ async def detailed_health_check(db: Session = Depends(get_db)):
     return health_status
 
 @router.get("/ready")
-async def readiness_check(db: Session = Depends(get_db)):
+async def readiness_check(db: AsyncSession = Depends(get_async_db)):
     """Readiness check para Kubernetes/Docker"""
     try:
         # Verificar se consegue conectar no banco
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         
         # Verificar se API key está configurada
-        if not settings.gemini_api_key or settings.gemini_api_key == "your_gemini_api_key_here":
+        if settings.summarizer_backend == "gemini" and (
+            not settings.gemini_api_key or settings.gemini_api_key == "your_gemini_api_key_here"
+        ):
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="Gemini API key not configured"
@@ -109,7 +123,7 @@ async def fallback_endpoint():
         "status": "fallback_active",
         "message": "O serviço está operando em modo de contingência",
         "fallback_data": {
-            "summary": "Este é um resumo de fallback. O serviço de resumo está temporariamente indisponível. Por favor, tente novamente mais tarde.",
+            "summary": FALLBACK_SUMMARY,
             "timestamp": datetime.datetime.now().isoformat()
         }
     }
\ No newline at end of file
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, HTTPException, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config.database import get_async_db
+from ..models.schemas import ResumoRequest, JobResponse
+from ..services.job_service import JobService
+from ..services.job_worker import build_job_worker_pool
+from ..dependencies.auth import get_current_user
+from ..services.auth_cache import AuthenticatedUser
+from .resumo import gemini_service
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+job_workers = build_job_worker_pool(gemini_service)
+
+@router.post("", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def criar_job(
+    request: ResumoRequest,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Enfileira um resumo para processamento em segundo plano"""
+    job = await JobService.enqueue(db, current_user.id, request.texto_a_resumir, request.modo)
+    job_workers.notify()
+    return job
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: int,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Retorna o status do job e, quando concluído, o id do resumo gerado"""
+    job = await JobService.get_user_job(db, job_id, current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
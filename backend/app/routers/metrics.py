@@ -0,0 +1,79 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from typing import Iterable
+from ..config.database import async_engine, engine
+from ..services.auth_cache import auth_cache
+from ..services.circuit_breaker import CLOSED, HALF_OPEN, OPEN
+from ..services.metrics import CONTENT_TYPE, MetricFamily, registry
+from ..services.summary_cache import summary_cache
+from .resumo import gemini_service
+
+router = APIRouter(tags=["metrics"])
+
+CIRCUIT_STATES = (CLOSED, HALF_OPEN, OPEN)
+
+def _pool_families() -> Iterable[MetricFamily]:
+    pools = {"async": async_engine.sync_engine.pool, "sync": engine.pool}
+    gauges = {
+        "db_pool_size": ("Conexões permanentes do pool", "size"),
+        "db_pool_checked_out": ("Conexões em uso", "checkedout"),
+        "db_pool_checked_in": ("Conexões livres no pool", "checkedin"),
+    }
+    for name, (help, method) in gauges.items():
+        yield MetricFamily(name, "gauge", help, [
+            ({"engine": label}, getattr(pool, method)()) for label, pool in pools.items() if hasattr(pool, method)
+        ])
+    yield MetricFamily("db_pool_overflow", "gauge", "Conexões abertas além do tamanho do pool", [
+        ({"engine": label}, max(pool.overflow(), 0)) for label, pool in pools.items() if hasattr(pool, "overflow")
+    ])
+
+    waits = {label: pool.wait_stats for label, pool in pools.items() if hasattr(pool, "wait_stats")}
+    yield MetricFamily("db_pool_checkouts_total", "counter", "Conexões entregues pelo pool", [
+        ({"engine": label}, stats.checkouts) for label, stats in waits.items()
+    ])
+    yield MetricFamily("db_pool_timeouts_total", "counter", "Esperas por conexão que estouraram o timeout", [
+        ({"engine": label}, stats.timeouts) for label, stats in waits.items()
+    ])
+    yield MetricFamily("db_pool_wait_seconds_total", "counter", "Tempo total esperando por conexões", [
+        ({"engine": label}, stats.total_wait) for label, stats in waits.items()
+    ])
+
+def _app_families() -> Iterable[MetricFamily]:
+    cache = summary_cache.stats()
+    yield MetricFamily("summary_cache_lookups_total", "counter", "Consultas ao cache de resumos", [
+        ({"result": "memory_hit"}, cache["memory_hits"]),
+        ({"result": "db_hit"}, cache["db_hits"]),
+        ({"result": "miss"}, cache["misses"]),
+    ])
+    yield MetricFamily("summary_cache_entries", "gauge", "Entradas na camada em memória do cache de resumos", [
+        ({}, cache["entries"])
+    ])
+
+    auth = auth_cache.stats()
+    yield MetricFamily("auth_cache_lookups_total", "counter", "Consultas ao cache de autenticação", [
+        ({"result": "hit"}, auth["hits"]),
+        ({"result": "miss"}, auth["misses"]),
+    ])
+
+    summarizer = gemini_service.stats()
+    breaker = summarizer["circuit_breaker"]
+    yield MetricFamily("llm_in_flight", "gauge", "Resumos em geração (chaves distintas)", [
+        ({}, summarizer["in_flight"])
+    ])
+    yield MetricFamily("llm_coalesced_requests_total", "counter", "Requisições atendidas por uma geração já em andamento", [
+        ({}, summarizer["coalesced_requests"])
+    ])
+    yield MetricFamily("llm_circuit_state", "gauge", "Estado do circuit breaker (1 no estado atual)", [
+        ({"state": state}, 1 if breaker["state"] == state else 0) for state in CIRCUIT_STATES
+    ])
+    yield MetricFamily("llm_circuit_rejected_total", "counter", "Chamadas rejeitadas com o circuito aberto", [
+        ({}, breaker["rejected_calls"])
+    ])
+
+registry.register_collector(_pool_families)
+registry.register_collector(_app_families)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Métricas no formato de exposição do Prometheus"""
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
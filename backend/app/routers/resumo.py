@@ -1,118 +1,341 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Any, AsyncIterator, Literal, Tuple
+import asyncio
 import csv
 import io
+import json
 from datetime import datetime
-from ..config.database import get_db
-from ..models.schemas import ResumoRequest, ResumoResponse, SummaryHistory, PaginatedSummaryResponse
-from ..models.database import User
-from ..services.gemini_service import GeminiService
+from ..config.database import get_async_db, AsyncSessionLocal
+from ..config.logging import get_logger
+from ..config.settings import get_settings
+from ..models.schemas import (
+    ResumoRequest, ResumoResponse, SummaryHistory, PaginatedSummaryResponse,
+    ResumoLoteRequest, ResumoLoteResponse, ResumoLoteItem
+)
+from ..models.database import Summary
+from ..services.gemini_service import GeminiService, ResultadoResumo
+from ..services.summary_cache import SummaryCache
 from ..services.user_service import UserService
 from ..dependencies.auth import get_current_user
+from ..services.auth_cache import AuthenticatedUser
 
+settings = get_settings()
 router = APIRouter(prefix="/api", tags=["resumo"])
 gemini_service = GeminiService()
+logger = get_logger("resumo")
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Formata um evento Server-Sent Events com payload JSON"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 @router.post("/resumir-texto", response_model=ResumoResponse)
 async def resumir_texto(
     request: ResumoRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Resumir texto e salvar no histórico do usuário"""
     try:
         # Gera o resumo usando IA
-        resumo = gemini_service.resumir_texto(request.texto_a_resumir)
-        
+        resultado = await gemini_service.resumir_texto_async(request.texto_a_resumir, request.modo)
+    except Exception as e:
+        print(f"Erro ao resumir texto: {e}")
+        raise HTTPException(status_code=500, detail="Erro ao resumir texto")
+    if resultado.indisponivel:
+        # O texto de fallback não é um resumo: nada é salvo no histórico
+        raise HTTPException(status_code=503, detail=resultado.resumo)
+    
+    try:
         # Salva no histórico do usuário
-        summary_record = UserService.create_summary(
+        summary_record = await UserService.create_summary(
             db=db,
             user_id=current_user.id,
             original_text=request.texto_a_resumir,
-            summary_text=resumo
+            summary_text=resultado.resumo
         )
         
         return ResumoResponse(
             id=summary_record.id,
-            resumo=resumo,
-            created_at=summary_record.created_at
+            resumo=resultado.resumo,
+            created_at=summary_record.created_at,
+            modo_usado=resultado.modo_usado,
+            degradado=resultado.degradado
         )
     except Exception as e:
         print(f"Erro ao resumir texto: {e}")
         raise HTTPException(status_code=500, detail="Erro ao resumir texto")
 
+@router.post("/resumir-texto/stream")
+async def resumir_texto_stream(
+    request: ResumoRequest,
+    current_user: AuthenticatedUser = Depends(get_current_user)
+):
+    """Resumir texto enviando o resumo via SSE à medida que é gerado"""
+    user_id = current_user.id
+    texto = request.texto_a_resumir
+    modo = request.modo
+
+    async def event_stream():
+        partes: List[str] = []
+        ultimo = None
+        try:
+            async for parte in gemini_service.resumir_texto_stream(texto, modo):
+                if parte.indisponivel:
+                    # O texto de fallback não é um resumo: nada é salvo no histórico
+                    yield _sse_event("error", {"detail": parte.resumo, "status": 503})
+                    return
+                ultimo = parte
+                partes.append(parte.resumo)
+                yield _sse_event("chunk", {"text": parte.resumo})
+
+            # Sessão própria: o stream termina depois que a dependency do banco é encerrada
+            async with AsyncSessionLocal() as db:
+                summary_record = await UserService.create_summary(
+                    db=db,
+                    user_id=user_id,
+                    original_text=texto,
+                    summary_text="".join(partes)
+                )
+            done = {
+                "id": summary_record.id,
+                "created_at": summary_record.created_at.isoformat(),
+                "status": "success",
+                "modo_usado": ultimo.modo_usado if ultimo else modo,
+                "degradado": ultimo.degradado if ultimo else False
+            }
+            yield _sse_event("done", done)
+        except asyncio.CancelledError:
+            # Cliente desconectou: a geração é interrompida e nada é salvo
+            logger.info(f"Streaming de resumo cancelado pelo cliente (usuário {user_id})")
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao resumir texto via streaming: {e}")
+            yield _sse_event("error", {"detail": "Erro ao resumir texto"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Evita buffering em proxies nginx
+        }
+    )
+
+@router.post("/resumir-lote", response_model=ResumoLoteResponse)
+async def resumir_lote(
+    request: ResumoLoteRequest,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Resumir vários textos de uma vez, salvando todos em uma única transação"""
+    if len(request.textos) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo de {settings.batch_max_items} textos por lote"
+        )
+
+    # Textos idênticos (após normalização) geram uma única chamada e um único resumo
+    unicos: Dict[str, str] = {}
+    chave_por_indice: List[str] = []
+    for texto in request.textos:
+        chave = SummaryCache.normalize_text(texto)
+        unicos.setdefault(chave, texto)
+        chave_por_indice.append(chave)
+
+    semaphore = asyncio.Semaphore(settings.batch_concurrency)
+
+    async def resumir(texto: str) -> ResultadoResumo:
+        async with semaphore:
+            return await gemini_service.resumir_texto_async(texto, request.modo)
+
+    chaves = list(unicos.keys())
+    resultados = await asyncio.gather(
+        *(resumir(unicos[chave]) for chave in chaves),
+        return_exceptions=True
+    )
+
+    registros: Dict[str, Tuple[int, ResultadoResumo]] = {}
+    erros: Dict[str, str] = {}
+    for chave, resultado in zip(chaves, resultados):
+        if isinstance(resultado, Exception):
+            logger.warning(f"Falha ao resumir item do lote: {resultado}")
+            erros[chave] = "Erro ao resumir texto"
+            continue
+        if resultado.indisponivel:
+            # O texto de fallback não é um resumo: o item falha e nada é salvo
+            erros[chave] = resultado.resumo
+            continue
+        try:
+            # Savepoint por item: uma falha ao salvar desfaz só este resumo
+            async with db.begin_nested():
+                registro = await UserService.create_summary(
+                    db=db,
+                    user_id=current_user.id,
+                    original_text=unicos[chave],
+                    summary_text=resultado.resumo,
+                    commit=False
+                )
+        except Exception as e:
+            logger.error(f"Erro ao salvar item do lote: {e}")
+            erros[chave] = "Erro ao salvar resumo"
+            continue
+        registros[chave] = (registro.id, resultado)
+    await db.commit()
+
+    # Uma única consulta para obter as datas geradas pelo banco
+    criados = {}
+    if registros:
+        ids = [summary_id for summary_id, _ in registros.values()]
+        result = await db.execute(select(Summary.id, Summary.created_at).where(Summary.id.in_(ids)))
+        criados = dict(result.all())
+
+    items: List[ResumoLoteItem] = []
+    for indice, chave in enumerate(chave_por_indice):
+        if chave in registros:
+            summary_id, resultado = registros[chave]
+            items.append(ResumoLoteItem(
+                indice=indice,
+                status="success",
+                id=summary_id,
+                resumo=resultado.resumo,
+                created_at=criados.get(summary_id),
+                modo_usado=resultado.modo_usado,
+                degradado=resultado.degradado
+            ))
+        else:
+            items.append(ResumoLoteItem(indice=indice, status="error", error=erros[chave]))
+
+    sucesso = sum(1 for item in items if item.status == "success")
+    return ResumoLoteResponse(
+        items=items,
+        total=len(items),
+        sucesso=sucesso,
+        falhas=len(items) - sucesso
+    )
+
 @router.get("/historico", response_model=PaginatedSummaryResponse)
 async def get_historico(
     skip: int = Query(0, ge=0, description="Número de itens para pular (paginação)"),
     limit: int = Query(10, ge=1, le=50, description="Número máximo de itens para retornar"),
     search: str = Query(None, description="Termo de busca para filtrar resumos"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: str = Query(None, description="Cursor da página anterior (next_cursor); substitui skip"),
+    count: Literal["exact", "capped", "none"] = Query(
+        "exact", description="Total na busca: exato, limitado a HISTORY_COUNT_CAP ou omitido"
+    ),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Retorna o histórico de resumos do usuário com paginação e filtragem"""
-    summaries = UserService.get_user_summaries(db, current_user.id, skip, limit, search)
-    total = UserService.count_user_summaries(db, current_user.id, search)
+    position = None
+    if cursor:
+        if search:
+            raise HTTPException(status_code=400, detail="Paginação por cursor não é suportada com busca")
+        try:
+            position = UserService.decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+    
+    # Um item a mais indica se existe próxima página
+    summaries = await UserService.get_user_summaries(db, current_user.id, skip, limit + 1, search, cursor=position)
+    has_more = len(summaries) > limit
+    summaries = summaries[:limit]
+    
+    # Sem busca o total vem do contador do usuário; com busca, a contagem é opcional
+    total = None
+    total_capped = False
+    if not search or count == "exact":
+        total = await UserService.count_user_summaries(db, current_user.id, search)
+    elif count == "capped":
+        total = await UserService.count_user_summaries(db, current_user.id, search, cap=settings.history_count_cap)
+        if total > settings.history_count_cap:
+            total = settings.history_count_cap
+            total_capped = True
     
     return PaginatedSummaryResponse(
         items=summaries,
         total=total,
         skip=skip,
-        limit=limit
+        limit=limit,
+        has_more=has_more,
+        total_capped=total_capped,
+        next_cursor=UserService.encode_cursor(summaries[-1]) if has_more and not search else None
     )
 
 @router.delete("/historico/{summary_id}")
 async def delete_summary(
     summary_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Deleta um resumo específico do usuário"""
-    success = UserService.delete_user_summary(db, summary_id, current_user.id)
+    success = await UserService.delete_user_summary(db, summary_id, current_user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Resumo não encontrado")
     return {"message": "Resumo deletado com sucesso"}
 
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+async def _export_chunks(user_id: int, search: str, fmt: str) -> AsyncIterator[str]:
+    """
+    Gera a exportação em pedaços de ~export_chunk_bytes à medida que as
+    linhas chegam do banco; a memória usada não depende do tamanho do histórico.
+    """
+    # Sessão própria: a resposta continua sendo enviada depois do fim do endpoint
+    async with AsyncSessionLocal() as db:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if fmt == "csv":
+            writer.writerow(["ID", "Texto Original", "Resumo", "Data de Criação"])
+        
+        rows = UserService.iter_user_summaries(db, user_id, search, batch_size=settings.export_batch_size)
+        async for summary_id, original_text, summary_text, created_at in rows:
+            if fmt == "csv":
+                writer.writerow([summary_id, original_text, summary_text, created_at.strftime("%Y-%m-%d %H:%M:%S")])
+            else:
+                buffer.write(json.dumps({
+                    "id": summary_id,
+                    "original_text": original_text,
+                    "summary_text": summary_text,
+                    "created_at": created_at.isoformat()
+                }, ensure_ascii=False))
+                buffer.write("\n")
+            
+            if buffer.tell() >= settings.export_chunk_bytes:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        
+        if buffer.tell():
+            yield buffer.getvalue()
+
 @router.get("/historico/export")
 async def export_historico(
     search: str = Query(None, description="Termo de busca para filtrar resumos"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    fmt: Literal["csv", "ndjson"] = Query("csv", alias="format", description="Formato: csv ou ndjson"),
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
-    """Exporta o histórico de resumos do usuário em formato CSV"""
-    # Busca todos os resumos do usuário (sem paginação, mas com filtro de busca se fornecido)
-    summaries = UserService.get_user_summaries(
-        db, 
-        current_user.id, 
-        skip=0, 
-        limit=1000,  # Limite alto para pegar a maioria dos resumos
-        search_term=search
-    )
-    
-    # Cria um buffer de memória para o CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Escreve o cabeçalho
-    writer.writerow(["ID", "Texto Original", "Resumo", "Data de Criação"])
-    
-    # Escreve os dados
-    for summary in summaries:
-        writer.writerow([
-            summary.id,
-            summary.original_text,
-            summary.summary_text,
-            summary.created_at.strftime("%Y-%m-%d %H:%M:%S")
-        ])
-    
-    # Prepara a resposta
-    output.seek(0)
+    """Exporta o histórico de resumos do usuário (CSV ou NDJSON), em streaming"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"historico_resumos_{timestamp}.csv"
+    filename = f"historico_resumos_{timestamp}.{fmt}"
     
     return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
+        _export_chunks(current_user.id, search, fmt),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
         headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
\ No newline at end of file
+    )
+
+# Depois de /historico/export, para que "export" não seja lido como id
+@router.get("/historico/{summary_id}", response_model=SummaryHistory)
+async def get_summary(
+    summary_id: int,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Retorna um resumo do usuário com o texto original completo"""
+    summary = await UserService.get_user_summary(db, summary_id, current_user.id)
+    if not summary:
+        raise HTTPException(status_code=404, detail="Resumo não encontrado")
+    return summary
\ No newline at end of file
@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional, Set, Tuple
+from ..config.settings import get_settings
+
+class AuthenticatedUser(NamedTuple):
+    """Identidade do usuário autenticado, sem sessão nem objeto ORM"""
+    id: int
+    email: str
+    username: str
+    name: Optional[str]
+    created_at: datetime
+
+class AuthCache:
+    """
+    Cache em memória (por processo) de token JWT já verificado → identidade.
+
+    Cada entrada vale por ttl_seconds, nunca além da expiração do próprio
+    token. invalidate_user remove todos os tokens de um usuário quando as
+    credenciais mudam; em outros processos a entrada expira pelo TTL. Na
+    revalidação, tokens com credential_version antiga são recusados
+    (dependencies.auth._load_identity).
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: int = 60, enabled: bool = True):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, AuthenticatedUser]]" = OrderedDict()
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _discard(self, token: str) -> None:
+        _, user = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(user.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user.id]
+
+    def get(self, token: str) -> Optional[AuthenticatedUser]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, user = entry
+            if expires_at < time.time():
+                self._discard(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return user
+
+    def set(self, token: str, user: AuthenticatedUser, token_expires_at: Optional[float] = None) -> None:
+        if not self.enabled:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        with self._lock:
+            if token in self._entries:
+                self._discard(token)
+            self._entries[token] = (expires_at, user)
+            self._tokens_by_user.setdefault(user.id, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Descarta as identidades em cache de um usuário (ex.: após troca de senha)"""
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._discard(token)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0
+            }
+
+def _build_cache() -> AuthCache:
+    settings = get_settings()
+    return AuthCache(
+        max_entries=settings.auth_cache_max_entries,
+        ttl_seconds=settings.auth_cache_ttl_seconds,
+        enabled=settings.auth_cache_enabled
+    )
+
+auth_cache = _build_cache()
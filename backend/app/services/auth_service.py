@@ -1,16 +1,28 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.database import User
 from app.models.schemas import TokenData
 from app.config.settings import get_settings
+from app.services.request_timing import phase, timed
 
 settings = get_settings()
 
-# Configuração do bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Configuração do bcrypt; hashes com outro custo são refeitos no login (needs_update)
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds)
+
+# Pool dedicado e limitado para o bcrypt (libera o GIL): rajadas de login
+# ocupam no máximo estas threads, sem travar o event loop nem o pool padrão
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers or os.cpu_count() or 1,
+    thread_name_prefix="bcrypt"
+)
 
 class AuthService:
     @staticmethod
@@ -23,6 +35,20 @@ class AuthService:
         """Gera hash da senha"""
         return pwd_context.hash(password)
     
+    @staticmethod
+    @timed("bcrypt")
+    async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+        """verify_password executado no pool do bcrypt"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, pwd_context.verify, plain_password, hashed_password)
+    
+    @staticmethod
+    @timed("bcrypt")
+    async def get_password_hash_async(password: str) -> str:
+        """get_password_hash executado no pool do bcrypt"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, pwd_context.hash, password)
+    
     @staticmethod
     def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
         """Cria token JWT"""
@@ -44,16 +70,29 @@ class AuthService:
             email: str = payload.get("sub")
             if email is None:
                 return None
-            return TokenData(email=email)
+            return TokenData(
+                email=email, user_id=payload.get("uid"), expires_at=payload.get("exp"),
+                credential_version=payload.get("cv", 0)
+            )
         except JWTError:
             return None
     
     @staticmethod
-    def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
-        """Autentica usuário"""
-        user = db.query(User).filter(User.email == email).first()
+    async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
+        """Autentica usuário sem bloquear o event loop com o bcrypt
+        
+        Se o hash armazenado usa outro custo (BCRYPT_ROUNDS mudou), a senha
+        é refeita com o custo atual, aproveitando que ela acabou de ser validada.
+        """
+        with phase("db"):
+            result = await db.execute(select(User).where(User.email == email))
+            user = result.scalars().first()
         if not user:
             return None
-        if not AuthService.verify_password(password, user.hashed_password):
+        if not await AuthService.verify_password_async(password, user.hashed_password):
             return None
+        if pwd_context.needs_update(user.hashed_password):
+            user.hashed_password = await AuthService.get_password_hash_async(password)
+            with phase("db"):
+                await db.commit()
         return user
\ No newline at end of file
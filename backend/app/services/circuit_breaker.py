@@ -0,0 +1,161 @@
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Tuple
+from ..config.settings import get_settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Mesmo texto do endpoint /api/health/fallback, usado quando nem o resumo
+# extrativo é possível com o circuito aberto
+FALLBACK_SUMMARY = (
+    "Este é um resumo de fallback. O serviço de resumo está temporariamente "
+    "indisponível. Por favor, tente novamente mais tarde."
+)
+
+class CircuitOpenError(Exception):
+    """O circuito está aberto: a chamada ao LLM nem foi tentada"""
+
+class CircuitBreaker:
+    """
+    Circuit breaker com janela deslizante de erros e latência.
+
+    Abre quando, com pelo menos min_calls chamadas na janela, a taxa de erro
+    ou a latência média passam dos limites. Aberto, rejeita chamadas por
+    open_seconds; depois deixa passar poucas chamadas de teste (half-open)
+    e fecha de novo se elas tiverem sucesso.
+    """
+
+    def __init__(self, window_seconds: float = 60, min_calls: int = 10, error_threshold: float = 0.5,
+                 latency_threshold: float = 30.0, open_seconds: float = 30, half_open_max_calls: int = 1,
+                 enabled: bool = True):
+        self.enabled = enabled
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_threshold = error_threshold
+        self.latency_threshold = latency_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self._calls: Deque[Tuple[float, bool, float]] = deque()  # (instante, sucesso, latência)
+        # Somas incrementais da janela, para não percorrê-la a cada chamada
+        self._errors = 0
+        self._latency_sum = 0.0
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float) -> None:
+        while self._calls and self._calls[0][0] < now - self.window_seconds:
+            _, success, latency = self._calls.popleft()
+            self._errors -= 0 if success else 1
+            self._latency_sum -= latency
+
+    def _reset_window(self) -> None:
+        self._calls.clear()
+        self._errors = 0
+        self._latency_sum = 0.0
+
+    def _window_stats(self) -> Tuple[int, float, float]:
+        total = len(self._calls)
+        if not total:
+            return 0, 0.0, 0.0
+        return total, self._errors / total, self._latency_sum / total
+
+    def _open(self, now: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._half_open_calls = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh_state(time.monotonic())
+            return self._state
+
+    def _refresh_state(self, now: float) -> None:
+        # Também libera novas sondas se uma sonda anterior nunca reportou resultado
+        if self._state in (OPEN, HALF_OPEN) and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._opened_at = now
+            self._half_open_calls = 0
+
+    def allow_request(self) -> bool:
+        """Reserva uma chamada; False significa falhar rápido"""
+        if not self.enabled:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._refresh_state(now)
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return True
+            self._rejected += 1
+            return False
+
+    def before_call(self) -> None:
+        if not self.allow_request():
+            raise CircuitOpenError("Serviço de resumo sobrecarregado; circuito aberto")
+
+    def record(self, success: bool, latency: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if self._state == HALF_OPEN:
+                if success:
+                    # Sonda bem-sucedida: recomeça com a janela limpa
+                    self._state = CLOSED
+                    self._reset_window()
+                else:
+                    self._open(now)
+                return
+
+            self._calls.append((now, success, latency))
+            self._errors += 0 if success else 1
+            self._latency_sum += latency
+            self._prune(now)
+            total, error_rate, avg_latency = self._window_stats()
+            if self._state == CLOSED and total >= self.min_calls and (
+                error_rate >= self.error_threshold or avg_latency >= self.latency_threshold
+            ):
+                self._open(now)
+
+    def record_success(self, latency: float) -> None:
+        self.record(True, latency)
+
+    def record_failure(self, latency: float) -> None:
+        self.record(False, latency)
+
+    def snapshot(self) -> Dict[str, object]:
+        """Estado atual para o health check"""
+        with self._lock:
+            now = time.monotonic()
+            self._refresh_state(now)
+            self._prune(now)
+            total, error_rate, avg_latency = self._window_stats()
+            return {
+                "enabled": self.enabled,
+                "state": self._state,
+                "window_calls": total,
+                "error_rate": round(error_rate, 4),
+                "avg_latency_seconds": round(avg_latency, 3),
+                "rejected_calls": self._rejected
+            }
+
+def build_circuit_breaker() -> CircuitBreaker:
+    settings = get_settings()
+    return CircuitBreaker(
+        window_seconds=settings.breaker_window_seconds,
+        min_calls=settings.breaker_min_calls,
+        error_threshold=settings.breaker_error_threshold,
+        latency_threshold=settings.breaker_latency_threshold_seconds,
+        open_seconds=settings.breaker_open_seconds,
+        half_open_max_calls=settings.breaker_half_open_max_calls,
+        enabled=settings.breaker_enabled
+    )
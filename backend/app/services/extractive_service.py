@@ -0,0 +1,150 @@
+import math
+import re
+import unicodedata
+from typing import List
+import numpy as np
+
+# Abreviações comuns em português que não encerram frase
+ABREVIACOES = {
+    "sr", "sra", "srta", "dr", "dra", "prof", "profa", "eng", "exmo", "exma",
+    "av", "r", "n", "nº", "art", "arts", "cap", "fig", "pág", "pag", "p",
+    "pp", "vol", "ed", "etc", "ex", "obs", "séc", "sec", "km", "min", "máx",
+    "jan", "fev", "abr", "mai", "jun", "jul", "ago", "nov", "dez",
+    "s.a", "ltda", "cia", "aprox", "tel", "cit", "ibid", "i.e", "e.g",
+}
+
+# Stopwords do português (sem acentos, como os tokens)
+STOPWORDS = set("""
+a ao aos aquela aquelas aquele aqueles aquilo as ate com como da das de dela delas dele
+deles depois do dos e ela elas ele eles em entre era eram essa essas esse esses esta estas
+este estes eu foi foram ha isso isto ja la lhe lhes mais mas me mesmo meu meus minha minhas
+muito na nas nao nem no nos nossa nossas nosso nossos num numa o os ou para pela pelas pelo
+pelos por qual quando que quem se sem ser seu seus so sua suas tambem te tem tinha to tu tua
+tuas um uma umas uns voce voces vos sao seja sejam sera serao estao esta estava estavam
+sobre apos ainda assim cada onde pois porque porem todo toda todos todas outro outra outros
+outras ter tendo sido sendo fazer faz fez podem pode poderia deve devem ja entao tao bem
+""".split())
+
+_CANDIDATO_FIM_FRASE = re.compile(r"(?<=[.!?…])\s+(?=[\"“'(\[]?[A-ZÁÉÍÓÚÂÊÔÃÕÀÇ0-9])")
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+class ExtractiveSummarizer:
+    """
+    Resumo extrativo local (TextRank sobre similaridade TF-IDF).
+
+    A matriz de similaridade S = X·Xᵀ entre frases nunca é materializada:
+    com X esparsa (formato COO em arrays NumPy), cada iteração do PageRank
+    calcula S·v como X·(Xᵀ·v) em O(nnz), então o custo cresce linearmente
+    com o tamanho do texto, mesmo com dezenas de milhares de frases.
+    """
+
+    def __init__(self, max_words: int = 100, damping: float = 0.85, max_iter: int = 50, tol: float = 1e-6):
+        self.max_words = max_words
+        self.damping = damping
+        self.max_iter = max_iter
+        self.tol = tol
+
+    @staticmethod
+    def split_sentences(texto: str) -> List[str]:
+        """Divide em frases, sem quebrar em abreviações como "Sr." ou "Dr." """
+        frases: List[str] = []
+        for paragrafo in re.split(r"\n\s*\n", texto):
+            pedacos = _CANDIDATO_FIM_FRASE.split(" ".join(paragrafo.split()))
+            atual = ""
+            for pedaco in pedacos:
+                atual = f"{atual} {pedaco}" if atual else pedaco
+                ultima_palavra = atual.rstrip(".").rsplit(" ", 1)[-1].lower()
+                if atual.endswith(".") and ultima_palavra in ABREVIACOES:
+                    continue
+                frases.append(atual)
+                atual = ""
+            if atual:
+                frases.append(atual)
+        return [frase for frase in frases if frase.strip()]
+
+    @staticmethod
+    def tokenize(frase: str) -> List[str]:
+        """Tokens em minúsculas, sem acentos e sem stopwords"""
+        sem_acentos = unicodedata.normalize("NFD", frase.lower()).encode("ascii", "ignore").decode("ascii")
+        return [t for t in _TOKEN.findall(sem_acentos) if len(t) > 2 and t not in STOPWORDS]
+
+    def _tfidf(self, frases: List[str]):
+        """Monta a matriz TF-IDF esparsa (linhas normalizadas) em formato COO"""
+        n = len(frases)
+        tokens_por_frase = [self.tokenize(frase) for frase in frases]
+        tamanhos = np.fromiter((len(tokens) for tokens in tokens_por_frase), dtype=np.int64, count=n)
+        todos = [token for tokens in tokens_por_frase for token in tokens]
+        if not todos:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0), n, 0
+
+        # Vocabulário e ids dos termos calculados de forma vetorizada
+        vocab, cols = np.unique(np.array(todos), return_inverse=True)
+        v = len(vocab)
+        rows = np.repeat(np.arange(n, dtype=np.int64), tamanhos)
+
+        # Agrupa (frase, termo) repetidos em contagens de frequência
+        keys = rows * v + cols.astype(np.int64)
+        keys, tf = np.unique(keys, return_counts=True)
+        rows_arr, cols_arr = keys // v, keys % v
+
+        df = np.bincount(cols_arr, minlength=v)
+        idf = np.log(n / df) + 1.0
+        vals = (1.0 + np.log(tf)) * idf[cols_arr]
+
+        norms = np.sqrt(np.bincount(rows_arr, weights=vals ** 2, minlength=n))
+        vals = vals / norms[rows_arr]
+        return rows_arr, cols_arr, vals, n, v
+
+    def score_sentences(self, frases: List[str]) -> np.ndarray:
+        """Pontuação TextRank de cada frase"""
+        rows, cols, vals, n, v = self._tfidf(frases)
+        if n == 0:
+            return np.empty(0)
+        if len(vals) == 0:
+            return np.full(n, 1.0 / n)
+
+        def similarity_dot(vetor: np.ndarray) -> np.ndarray:
+            # (S - I)·vetor sem materializar S; frases sem termos têm diagonal 0
+            xt_v = np.bincount(cols, weights=vals * vetor[rows], minlength=v)
+            s_v = np.bincount(rows, weights=vals * xt_v[cols], minlength=n)
+            return s_v - diagonal * vetor
+
+        diagonal = np.bincount(rows, weights=vals ** 2, minlength=n)
+        grau = similarity_dot(np.ones(n))
+        sem_vizinhos = grau <= 1e-12
+        grau_seguro = np.where(sem_vizinhos, 1.0, grau)
+
+        scores = np.full(n, 1.0 / n)
+        for _ in range(self.max_iter):
+            # Frases sem similaridade com nenhuma outra distribuem peso uniformemente
+            pendente = scores[sem_vizinhos].sum() / n
+            propagado = similarity_dot(np.where(sem_vizinhos, 0.0, scores / grau_seguro))
+            novos = (1 - self.damping) / n + self.damping * (propagado + pendente)
+            if np.abs(novos - scores).sum() < self.tol:
+                scores = novos
+                break
+            scores = novos
+        return scores
+
+    def summarize(self, texto: str) -> str:
+        """Seleciona as frases mais centrais, na ordem original, até max_words palavras"""
+        frases = self.split_sentences(texto)
+        if not frases:
+            return ""
+        scores = self.score_sentences(frases)
+
+        selecionadas: List[int] = []
+        palavras = 0
+        for i in np.argsort(-scores, kind="stable"):
+            tamanho = len(frases[i].split())
+            if selecionadas and palavras + tamanho > self.max_words:
+                break
+            selecionadas.append(int(i))
+            palavras += tamanho
+
+        resumo = " ".join(frases[i] for i in sorted(selecionadas))
+        palavras_resumo = resumo.split()
+        if len(palavras_resumo) > math.ceil(self.max_words * 1.5):
+            # Uma única frase enorme: corta no limite de palavras
+            resumo = " ".join(palavras_resumo[:self.max_words]) + "…"
+        return resumo
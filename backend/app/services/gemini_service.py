@@ -1,45 +1,418 @@
-import google.generativeai as genai
 from ..config.settings import get_settings
+from ..config.logging import get_logger
+from .circuit_breaker import OPEN, CircuitOpenError, FALLBACK_SUMMARY, build_circuit_breaker
+from .extractive_service import ExtractiveSummarizer
+from .metrics import LLM_ERRORS, LLM_LATENCY, LLM_OUTPUT_CHARS, LLM_PROMPT_CHARS, LLM_RETRIES
+from .request_timing import phase
+from .summary_cache import summary_cache
+from .summarizer_backends import SummarizerBackend, get_backend
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Iterator, List, NamedTuple, Optional
+import asyncio
+import re
+import threading
 import time
 import random
 
+# Incrementar sempre que o prompt mudar, para invalidar o cache de resumos
+PROMPT_VERSION = "v1"
+
+logger = get_logger("gemini_service")
+
+class ResultadoResumo(NamedTuple):
+    """Resumo (ou pedaço do resumo, no streaming) com o modo efetivamente usado"""
+    resumo: str
+    modo_usado: str  # abstrativo, extrativo ou indisponivel (resumo = FALLBACK_SUMMARY)
+    degradado: bool = False  # LLM pedido, mas indisponível (circuito aberto ou falha no modo auto)
+
+    @property
+    def indisponivel(self) -> bool:
+        """Nem o extrativo gerou texto: o resultado não deve ser salvo no histórico"""
+        return self.modo_usado == "indisponivel"
+
 class GeminiService:
-    def __init__(self):
+    def __init__(self, backend: Optional[SummarizerBackend] = None):
         settings = get_settings()
-        genai.configure(api_key=settings.gemini_api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
-    
-    def resumir_texto(self, texto: str) -> str:
-        prompt = f"""
+        # Backend de geração configurado em SUMMARIZER_BACKEND (gemini ou stub)
+        self.backend = backend or get_backend(settings)
+        self.max_retries = settings.gemini_max_retries
+        # Falha rápido durante sobrecargas do LLM (estado em /api/health/detailed)
+        self.breaker = build_circuit_breaker()
+        # Pool limitado de threads para as chamadas bloqueantes do SDK:
+        # o event loop nunca espera pelo Gemini e o número de chamadas
+        # simultâneas fica limitado a gemini_max_concurrency
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.gemini_max_concurrency,
+            thread_name_prefix="gemini"
+        )
+        # Textos acima do limite são resumidos em trechos paralelos (map-reduce)
+        self.chunking_threshold = settings.summary_chunking_threshold_chars
+        self.chunk_size = settings.summary_chunk_size_chars
+        self.chunk_concurrency = settings.summary_chunk_concurrency
+        # Modo extrativo local (sem LLM) e fallback do modo "auto"
+        self.extractive = ExtractiveSummarizer(max_words=settings.extractive_max_words)
+        self.extractive_auto_threshold = settings.extractive_auto_threshold_chars
+        self.cache = summary_cache
+        # Chamadas em andamento por chave de cache (single-flight)
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.coalesced = 0
+        self.cache_namespace = f"{self.backend.model_name}:{PROMPT_VERSION}"
+
+    def _build_prompt(self, texto: str) -> str:
+        return f"""
         Você é um especialista em resumir textos longos de forma clara e concisa.
-        
+
         Sua tarefa é:
         1. Ler o texto fornecido
         2. Identificar os pontos principais
         3. Criar um resumo claro e objetivo
         4. Manter no máximo 100 palavras
-        
+
         Texto para resumir:
         {texto}
-        
+
         Resumo:
         """
-        
-        max_retries = 3
-        for attempt in range(max_retries):
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """Indica se o erro é uma sobrecarga temporária do Gemini"""
+        error_msg = str(error)
+        return "overloaded" in error_msg or "503" in error_msg or "Deadline Exceeded" in error_msg
+
+    @staticmethod
+    def _backoff_seconds() -> float:
+        # Aguarda entre 2-5 segundos antes de tentar novamente
+        return random.uniform(2, 5)
+
+    def _before_call(self) -> None:
+        # Circuito aberto: falha na hora, sem chamada ao modelo e sem retries
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            LLM_ERRORS.inc(self.backend.name, "circuit_open")
+            raise
+
+    def _record_call(self, call: str, prompt: str, elapsed: float, output_chars: Optional[int],
+                     error: Optional[Exception] = None) -> None:
+        """Métricas de uma chamada ao modelo (latência, tamanhos e erro)"""
+        backend = self.backend.name
+        LLM_LATENCY.observe(elapsed, backend, call, "success" if error is None else "error")
+        LLM_PROMPT_CHARS.observe(len(prompt), backend)
+        if error is None:
+            LLM_OUTPUT_CHARS.observe(output_chars, backend)
+        else:
+            LLM_ERRORS.inc(backend, "overloaded" if self._is_retryable(error) else "error")
+
+    def _generate(self, prompt: str) -> str:
+        """Chamada bloqueante ao modelo (executada no pool de threads)"""
+        self._before_call()
+        started = time.perf_counter()
+        try:
+            resumo = self.backend.generate(prompt)
+        except Exception as e:
+            elapsed = time.perf_counter() - started
+            self.breaker.record_failure(elapsed)
+            self._record_call("generate", prompt, elapsed, None, e)
+            raise
+        elapsed = time.perf_counter() - started
+        self.breaker.record_success(elapsed)
+        self._record_call("generate", prompt, elapsed, len(resumo))
+        return resumo
+
+    def _usa_extrativo(self, texto: str, modo: str) -> bool:
+        return modo == "extrativo" or (modo == "auto" and len(texto) >= self.extractive_auto_threshold)
+
+    async def resumir_texto_async(self, texto: str, modo: str = "abstrativo") -> ResultadoResumo:
+        """
+        Gera o resumo sem bloquear o event loop: o SDK roda no pool de
+        threads e as esperas entre tentativas usam asyncio.sleep.
+
+        modo: "abstrativo" (LLM), "extrativo" (local, sem LLM) ou "auto",
+        que usa o extrativo para textos longos ou quando o LLM falha.
+        Com o circuit breaker aberto, qualquer modo degrada para o extrativo.
+        O resultado informa o modo realmente usado.
+        """
+        if self._usa_extrativo(texto, modo):
+            return ResultadoResumo(await self._resumir_extrativo_async(texto), "extrativo")
+        try:
+            return ResultadoResumo(await self._resumir_abstrativo_async(texto), "abstrativo")
+        except CircuitOpenError:
+            return await self._resumir_degradado_async(texto)
+        except Exception as e:
+            if modo != "auto":
+                raise
+            logger.warning(f"Falha no resumo abstrativo, usando extrativo: {e}")
+            return await self._resumir_degradado_async(texto)
+
+    async def _resumir_extrativo_async(self, texto: str) -> str:
+        # CPU-bound: roda fora do event loop
+        loop = asyncio.get_running_loop()
+        with phase("extractive"):
+            return await loop.run_in_executor(None, self.extractive.summarize, texto)
+
+    async def _resumir_degradado_async(self, texto: str) -> ResultadoResumo:
+        """Resposta com o LLM indisponível: extrativo ou, se vazio, o texto de fallback"""
+        resumo = await self._resumir_extrativo_async(texto)
+        if resumo:
+            return ResultadoResumo(resumo, "extrativo", degradado=True)
+        return ResultadoResumo(FALLBACK_SUMMARY, "indisponivel", degradado=True)
+
+    async def _resumir_abstrativo_async(self, texto: str) -> str:
+        """
+        Requisições simultâneas com o mesmo texto normalizado aguardam a
+        mesma chamada em andamento (single-flight) em vez de abrir outra.
+        """
+        key = self.cache.make_key(texto, self.cache_namespace)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._resumir_com_cache_async(key, texto))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._finish_in_flight(key, t))
+        else:
+            self.coalesced += 1
+        # shield: um cliente que desiste não cancela a chamada dos demais
+        return await asyncio.shield(task)
+
+    async def _resumir_com_cache_async(self, key: str, texto: str) -> str:
+        resumo = await self.cache.get_async(key)
+        if resumo is None:
+            resumo = await self._gerar_resumo_async(texto)
+            await self.cache.set_async(key, resumo)
+        return resumo
+
+    def _finish_in_flight(self, key: str, task: asyncio.Future) -> None:
+        self._in_flight.pop(key, None)
+        # Evita aviso de exceção não recuperada se todos os clientes desistiram
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "backend": self.backend.name,
+            "in_flight": len(self._in_flight),
+            "coalesced_requests": self.coalesced,
+            "circuit_breaker": self.breaker.snapshot()
+        }
+
+    async def _gerar_resumo_async(self, texto: str) -> str:
+        if len(texto) > self.chunking_threshold:
+            return await self._map_reduce_async(texto)
+        return await self._generate_with_retry_async(self._build_prompt(texto))
+
+    async def _generate_with_retry_async(self, prompt: str) -> str:
+        loop = asyncio.get_running_loop()
+
+        for attempt in range(self.max_retries):
             try:
-                response = self.model.generate_content(prompt)
-                return response.text
+                with phase("llm"):
+                    return await loop.run_in_executor(self._executor, self._generate, prompt)
             except Exception as e:
-                error_msg = str(e)
-                if "overloaded" in error_msg or "503" in error_msg or "Deadline Exceeded" in error_msg:
-                    if attempt < max_retries - 1:
-                        # Aguarda entre 2-5 segundos antes de tentar novamente
-                        wait_time = random.uniform(2, 5)
-                        time.sleep(wait_time)
+                if self._is_retryable(e):
+                    if self.breaker.state == OPEN:
+                        # Esta falha abriu o circuito: não adianta esperar e tentar de novo
+                        raise CircuitOpenError(str(e))
+                    if attempt < self.max_retries - 1:
+                        LLM_RETRIES.inc(self.backend.name)
+                        # Espera sem bloquear o event loop nem ocupar uma thread do pool
+                        await asyncio.sleep(self._backoff_seconds())
                         continue
                     else:
                         raise Exception("Serviço temporariamente indisponível. Tente novamente em alguns minutos.")
                 else:
                     # Para outros tipos de erro, não tenta novamente
-                    raise e
\ No newline at end of file
+                    raise e
+
+    # Modo map-reduce para textos longos
+    @staticmethod
+    def _split_into_chunks(texto: str, max_chars: int) -> List[str]:
+        """
+        Divide o texto em trechos de até max_chars, respeitando parágrafos
+        e, quando um parágrafo não cabe, fronteiras de frase.
+        """
+        pieces: List[str] = []
+        for paragrafo in re.split(r"\n\s*\n", texto):
+            paragrafo = paragrafo.strip()
+            if not paragrafo:
+                continue
+            if len(paragrafo) <= max_chars:
+                pieces.append(paragrafo)
+                continue
+            for frase in re.split(r"(?<=[.!?;])\s+", paragrafo):
+                # Frases gigantes (sem pontuação) são cortadas no limite
+                for i in range(0, len(frase), max_chars):
+                    pieces.append(frase[i:i + max_chars])
+
+        chunks: List[str] = []
+        current = ""
+        for piece in pieces:
+            if current and len(current) + len(piece) + 2 > max_chars:
+                chunks.append(current)
+                current = piece
+            else:
+                current = f"{current}\n\n{piece}" if current else piece
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _build_chunk_prompt(self, trecho: str, indice: int, total: int) -> str:
+        return f"""
+        Você está resumindo um texto longo dividido em {total} partes.
+        Esta é a parte {indice} de {total}.
+
+        Resuma esta parte em no máximo 150 palavras, preservando fatos,
+        nomes e números importantes. Não adicione introduções ou conclusões.
+
+        Parte do texto:
+        {trecho}
+
+        Resumo da parte:
+        """
+
+    def _build_reduce_prompt(self, resumos_parciais: str) -> str:
+        return f"""
+        Você é um especialista em resumir textos longos de forma clara e concisa.
+
+        Abaixo estão resumos parciais, em ordem, de partes consecutivas de um mesmo texto.
+        Combine-os em um único resumo claro e objetivo do texto completo,
+        com no máximo 100 palavras.
+
+        Resumos parciais:
+        {resumos_parciais}
+
+        Resumo:
+        """
+
+    async def _map_async(self, texto: str) -> str:
+        """Fase map: resume os trechos em paralelo e devolve os resumos parciais"""
+        chunks = self._split_into_chunks(texto, self.chunk_size)
+        semaphore = asyncio.Semaphore(self.chunk_concurrency)
+
+        async def resumir_trecho(indice: int, trecho: str) -> str:
+            async with semaphore:
+                return await self._generate_with_retry_async(
+                    self._build_chunk_prompt(trecho, indice, len(chunks))
+                )
+
+        parciais = await asyncio.gather(
+            *(resumir_trecho(i + 1, trecho) for i, trecho in enumerate(chunks))
+        )
+        combinado = "\n\n".join(parciais)
+        # Muitos trechos: reduz em mais um nível enquanto o resultado encolher
+        if len(combinado) > self.chunking_threshold and len(combinado) < len(texto):
+            return await self._map_async(combinado)
+        return combinado
+
+    async def _map_reduce_async(self, texto: str) -> str:
+        combinado = await self._map_async(texto)
+        return await self._generate_with_retry_async(self._build_reduce_prompt(combinado))
+
+    # Streaming
+    def _generate_stream(self, prompt: str) -> Iterator[str]:
+        """Chamada bloqueante em modo streaming (executada no pool de threads)"""
+        self._before_call()
+        started = time.perf_counter()
+        output_chars = 0
+        try:
+            for parte in self.backend.generate_stream(prompt):
+                output_chars += len(parte)
+                yield parte
+        except Exception as e:
+            elapsed = time.perf_counter() - started
+            self.breaker.record_failure(elapsed)
+            self._record_call("stream", prompt, elapsed, None, e)
+            raise
+        elapsed = time.perf_counter() - started
+        self.breaker.record_success(elapsed)
+        self._record_call("stream", prompt, elapsed, output_chars)
+
+    async def _stream_with_retry_async(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Repassa os pedaços gerados pelo modelo para o event loop à medida que
+        chegam. Só tenta novamente se nada tiver sido enviado ao cliente ainda.
+        """
+        loop = asyncio.get_running_loop()
+
+        for attempt in range(self.max_retries):
+            queue: asyncio.Queue = asyncio.Queue()
+            cancelled = threading.Event()
+
+            def produce() -> None:
+                try:
+                    for parte in self._generate_stream(prompt):
+                        if cancelled.is_set():
+                            return
+                        loop.call_soon_threadsafe(queue.put_nowait, ("chunk", parte))
+                    loop.call_soon_threadsafe(queue.put_nowait, ("done", None))
+                except Exception as e:
+                    if not cancelled.is_set():
+                        loop.call_soon_threadsafe(queue.put_nowait, ("error", e))
+
+            loop.run_in_executor(self._executor, produce)
+            emitted = False
+            try:
+                while True:
+                    # Só a espera pelo modelo conta como llm, não o envio ao cliente
+                    with phase("llm"):
+                        kind, value = await queue.get()
+                    if kind == "chunk":
+                        emitted = True
+                        yield value
+                    elif kind == "done":
+                        return
+                    else:
+                        raise value
+            except Exception as e:
+                if self._is_retryable(e):
+                    if not emitted and self.breaker.state == OPEN:
+                        raise CircuitOpenError(str(e))
+                    if not emitted and attempt < self.max_retries - 1:
+                        LLM_RETRIES.inc(self.backend.name)
+                        await asyncio.sleep(self._backoff_seconds())
+                        continue
+                    raise Exception("Serviço temporariamente indisponível. Tente novamente em alguns minutos.")
+                raise e
+            finally:
+                # Cliente desconectado ou erro: a thread para no próximo pedaço
+                cancelled.set()
+
+    async def resumir_texto_stream(self, texto: str, modo: str = "abstrativo") -> AsyncIterator[ResultadoResumo]:
+        """Gera o resumo em pedaços, conforme o modelo produz o texto (cada um com o modo usado)"""
+        if self._usa_extrativo(texto, modo):
+            yield ResultadoResumo(await self._resumir_extrativo_async(texto), "extrativo")
+            return
+
+        emitted = False
+        try:
+            async for parte in self._resumir_abstrativo_stream(texto):
+                emitted = True
+                yield ResultadoResumo(parte, "abstrativo")
+        except Exception as e:
+            # Só dá para trocar de modo se nada foi enviado ao cliente
+            if emitted or (modo != "auto" and not isinstance(e, CircuitOpenError)):
+                raise
+            logger.warning(f"Falha no resumo abstrativo, usando extrativo: {e}")
+            yield await self._resumir_degradado_async(texto)
+
+    async def _resumir_abstrativo_stream(self, texto: str) -> AsyncIterator[str]:
+        key = self.cache.make_key(texto, self.cache_namespace)
+        resumo = await self.cache.get_async(key)
+        if resumo is not None:
+            yield resumo
+            return
+
+        if len(texto) > self.chunking_threshold:
+            # Textos longos: a fase map roda normalmente e só a redução é transmitida
+            prompt = self._build_reduce_prompt(await self._map_async(texto))
+        else:
+            prompt = self._build_prompt(texto)
+
+        partes: List[str] = []
+        async for parte in self._stream_with_retry_async(prompt):
+            partes.append(parte)
+            yield parte
+        await self.cache.set_async(key, "".join(partes))
+
+    def shutdown(self) -> None:
+        """Libera o pool de threads no desligamento da aplicação"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
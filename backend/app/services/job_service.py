@@ -0,0 +1,159 @@
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.database import SummaryJob
+from .user_service import UserService
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+class ClaimedJob(NamedTuple):
+    """Dados do job reservado por um worker (sem sessão associada)"""
+    id: int
+    user_id: int
+    original_text: str
+    modo: str
+    attempts: int
+
+class JobService:
+    @staticmethod
+    async def enqueue(db: AsyncSession, user_id: int, original_text: str, modo: str = "abstrativo") -> SummaryJob:
+        """Enfileira um novo job de resumo"""
+        job = SummaryJob(user_id=user_id, original_text=original_text, modo=modo, status=JOB_PENDING, attempts=0)
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+        return job
+
+    @staticmethod
+    async def get_user_job(db: AsyncSession, job_id: int, user_id: int) -> Optional[SummaryJob]:
+        """Busca um job do usuário"""
+        result = await db.execute(
+            select(SummaryJob).where(
+                SummaryJob.id == job_id,
+                SummaryJob.user_id == user_id
+            )
+        )
+        return result.scalars().first()
+
+    @staticmethod
+    async def claim_next(db: AsyncSession, visibility_timeout: int, max_attempts: int) -> Optional[ClaimedJob]:
+        """
+        Reserva o próximo job disponível: pendente, ou em execução com o
+        timeout de visibilidade vencido (worker que morreu no meio).
+        A reserva é um UPDATE condicional, seguro entre processos.
+        """
+        while True:
+            now = datetime.utcnow()
+            result = await db.execute(
+                select(
+                    SummaryJob.id, SummaryJob.user_id, SummaryJob.original_text, SummaryJob.modo, SummaryJob.attempts
+                ).where(
+                    SummaryJob.status.in_([JOB_PENDING, JOB_RUNNING]),
+                    or_(SummaryJob.locked_until.is_(None), SummaryJob.locked_until < now)
+                ).order_by(SummaryJob.id).limit(1)
+            )
+            candidate = result.first()
+            if candidate is None:
+                return None
+            job = ClaimedJob(
+                candidate.id, candidate.user_id, candidate.original_text, candidate.modo, candidate.attempts + 1
+            )
+
+            claimed = await db.execute(
+                update(SummaryJob).where(
+                    SummaryJob.id == job.id,
+                    SummaryJob.attempts == job.attempts - 1,
+                    SummaryJob.status.in_([JOB_PENDING, JOB_RUNNING])
+                ).values(
+                    status=JOB_RUNNING,
+                    attempts=job.attempts,
+                    locked_until=now + timedelta(seconds=visibility_timeout)
+                ).execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            if not claimed.rowcount:
+                # Outro worker reservou antes; tenta o próximo
+                continue
+
+            if job.attempts > max_attempts:
+                await db.execute(
+                    update(SummaryJob).where(SummaryJob.id == job.id).values(
+                        status=JOB_FAILED,
+                        original_text="",
+                        locked_until=None,
+                        error="Número máximo de tentativas excedido"
+                    ).execution_options(synchronize_session=False)
+                )
+                await db.commit()
+                continue
+
+            return job
+
+    @staticmethod
+    async def complete(db: AsyncSession, job: ClaimedJob, summary_text: str) -> bool:
+        """
+        Salva o resumo e conclui o job na mesma transação. Retorna False se
+        o job foi reservado por outro worker depois do timeout de visibilidade.
+        """
+        summary = await UserService.create_summary(
+            db=db,
+            user_id=job.user_id,
+            original_text=job.original_text,
+            summary_text=summary_text,
+            commit=False
+        )
+        updated = await db.execute(
+            update(SummaryJob).where(
+                SummaryJob.id == job.id,
+                SummaryJob.status == JOB_RUNNING,
+                SummaryJob.attempts == job.attempts
+            ).values(
+                status=JOB_DONE,
+                summary_id=summary.id,
+                # O texto já está no resumo (text_blobs, comprimido): a fila não guarda outra cópia
+                original_text="",
+                locked_until=None,
+                error=None
+            ).execution_options(synchronize_session=False)
+        )
+        if not updated.rowcount:
+            await db.rollback()
+            return False
+        await db.commit()
+        return True
+
+    @staticmethod
+    async def fail(db: AsyncSession, job: ClaimedJob, error: str, max_attempts: int, retry_delay: int) -> None:
+        """Devolve o job para a fila com atraso crescente ou marca como falho"""
+        values = {"error": error}
+        if job.attempts < max_attempts:
+            values["status"] = JOB_PENDING
+            values["locked_until"] = datetime.utcnow() + timedelta(seconds=retry_delay * job.attempts)
+        else:
+            values["status"] = JOB_FAILED
+            values["original_text"] = ""
+            values["locked_until"] = None
+        await db.execute(
+            update(SummaryJob).where(
+                SummaryJob.id == job.id,
+                SummaryJob.status == JOB_RUNNING,
+                SummaryJob.attempts == job.attempts
+            ).values(**values).execution_options(synchronize_session=False)
+        )
+        await db.commit()
+    
+    @staticmethod
+    async def prune_finished(db: AsyncSession, older_than: datetime) -> int:
+        """Apaga jobs concluídos ou falhos sem atualização desde older_than"""
+        result = await db.execute(
+            delete(SummaryJob).where(
+                SummaryJob.status.in_([JOB_DONE, JOB_FAILED]),
+                SummaryJob.updated_at < older_than
+            ).execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount
@@ -0,0 +1,149 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+from ..config.database import AsyncSessionLocal
+from ..config.logging import get_logger
+from ..config.settings import get_settings
+from .job_service import JobService, ClaimedJob
+
+logger = get_logger("job_worker")
+
+class JobWorkerPool:
+    """
+    Pool de workers asyncio que drena a fila summary_jobs.
+
+    Cada processo da API roda seu próprio pool; a reserva condicional em
+    JobService.claim_next garante que um job só é processado por um worker.
+    Jobs interrompidos voltam à fila quando o timeout de visibilidade vence.
+    Jobs concluídos ou falhos são apagados após retention_hours, por um
+    worker ocioso, no máximo uma vez a cada prune_interval segundos.
+    """
+
+    def __init__(self, summarizer, workers: int, poll_interval: float, visibility_timeout: int,
+                 max_attempts: int, retry_delay: int, retention_hours: int = 168,
+                 prune_interval: float = 3600, shutdown_grace: float = 5.0):
+        self.summarizer = summarizer
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.retention = timedelta(hours=retention_hours)
+        self.prune_interval = prune_interval
+        self._next_prune = 0.0
+        self.shutdown_grace = shutdown_grace
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def start(self) -> None:
+        if self.workers <= 0 or self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._run(i)) for i in range(self.workers)]
+        logger.info(f"{self.workers} workers de jobs de resumo iniciados")
+
+    async def stop(self) -> None:
+        if not self._tasks:
+            return
+        # Workers param no fim da iteração atual: cancelar no meio de uma consulta
+        # deixaria a conexão do aiosqlite (e sua thread) aberta
+        self._stopping = True
+        self._wakeup.set()
+        _, pending = await asyncio.wait(self._tasks, timeout=self.shutdown_grace)
+        for task in pending:
+            task.cancel()
+        # Jobs interrompidos ficam "running" e voltam à fila pelo timeout de visibilidade
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Acorda os workers ociosos logo após um enfileiramento"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _claim(self) -> Optional[ClaimedJob]:
+        async with AsyncSessionLocal() as db:
+            return await JobService.claim_next(db, self.visibility_timeout, self.max_attempts)
+
+    async def _complete(self, job: ClaimedJob, summary_text: str) -> bool:
+        async with AsyncSessionLocal() as db:
+            return await JobService.complete(db, job, summary_text)
+
+    async def _fail(self, job: ClaimedJob, error: str) -> None:
+        async with AsyncSessionLocal() as db:
+            await JobService.fail(db, job, error, self.max_attempts, self.retry_delay)
+
+    async def _run(self, worker_id: int) -> None:
+        while not self._stopping:
+            try:
+                job = await self._claim()
+            except Exception as e:
+                logger.error(f"Worker {worker_id}: erro ao buscar job: {e}")
+                job = None
+
+            if job is None:
+                await self._maybe_prune(worker_id)
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                if not self._stopping:
+                    self._wakeup.clear()
+                continue
+
+            try:
+                await self._process(job)
+            except Exception as e:
+                logger.error(f"Worker {worker_id}: erro ao processar job {job.id}: {e}")
+
+    async def _maybe_prune(self, worker_id: int) -> None:
+        now = time.monotonic()
+        if now < self._next_prune:
+            return
+        # Atualizado antes do await: os outros workers do processo não repetem a limpeza
+        self._next_prune = now + self.prune_interval
+        try:
+            async with AsyncSessionLocal() as db:
+                deleted = await JobService.prune_finished(db, datetime.utcnow() - self.retention)
+            if deleted:
+                logger.info(f"{deleted} jobs finalizados removidos da fila")
+        except Exception as e:
+            logger.warning(f"Worker {worker_id}: falha ao limpar jobs finalizados: {e}")
+
+    async def _process(self, job: ClaimedJob) -> None:
+        try:
+            resultado = await self.summarizer.resumir_texto_async(job.original_text, job.modo)
+        except Exception as e:
+            logger.warning(f"Job {job.id} falhou na tentativa {job.attempts}: {e}")
+            await self._fail(job, str(e))
+            return
+        if resultado.indisponivel:
+            # Texto de fallback não vai para o histórico: o job tenta de novo mais tarde
+            logger.warning(f"Job {job.id}: serviço de resumo indisponível na tentativa {job.attempts}")
+            await self._fail(job, resultado.resumo)
+            return
+        resumo = resultado.resumo
+
+        try:
+            completed = await self._complete(job, resumo)
+        except Exception as e:
+            logger.error(f"Job {job.id}: erro ao salvar resultado: {e}")
+            await self._fail(job, str(e))
+            return
+        if not completed:
+            logger.warning(f"Job {job.id} foi reservado por outro worker; resultado descartado")
+
+def build_job_worker_pool(summarizer) -> JobWorkerPool:
+    settings = get_settings()
+    return JobWorkerPool(
+        summarizer,
+        workers=settings.job_workers,
+        poll_interval=settings.job_poll_interval_seconds,
+        visibility_timeout=settings.job_visibility_timeout_seconds,
+        max_attempts=settings.job_max_attempts,
+        retry_delay=settings.job_retry_delay_seconds,
+        retention_hours=settings.job_retention_hours
+    )
@@ -0,0 +1,212 @@
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Exposição no formato texto do Prometheus (versão 0.0.4)
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LLM_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+CHARS_BUCKETS = (100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000)
+
+class MetricFamily(NamedTuple):
+    """Métrica calculada na hora da coleta (estatísticas já mantidas em outro lugar)"""
+    name: str
+    kind: str  # counter ou gauge
+    help: str
+    samples: List[Tuple[Dict[str, str], float]]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+class _ShardedMetric:
+    """
+    Cada thread escreve só no seu próprio dicionário (shard), então o
+    caminho quente não usa lock. A coleta soma os shards de todas as
+    threads; o lock só é usado quando uma thread nova aparece.
+    """
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def _snapshots(self) -> List[dict]:
+        with self._lock:
+            shards = list(self._shards)
+        # dict.copy é atômico sob o GIL, mesmo com a thread dona escrevendo
+        return [shard.copy() for shard in shards]
+
+class Counter(_ShardedMetric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+    def values(self) -> Dict[Tuple[str, ...], float]:
+        totals: Dict[Tuple[str, ...], float] = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0.0) + value
+        return totals
+
+    def render(self) -> Iterable[str]:
+        for labels, value in sorted(self.values().items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+class Histogram(_ShardedMetric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        shard = self._shard()
+        state = shard.get(labels)
+        if state is None:
+            # Contagem por faixa (a última é +Inf) seguida da soma dos valores
+            state = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def values(self) -> Dict[Tuple[str, ...], List[float]]:
+        totals: Dict[Tuple[str, ...], List[float]] = {}
+        for shard in self._snapshots():
+            for labels, state in shard.items():
+                merged = totals.setdefault(labels, [0] * len(state))
+                for i, value in enumerate(list(state)):
+                    merged[i] += value
+        return totals
+
+    def render(self) -> Iterable[str]:
+        bucket_labels = self.labelnames + ("le",)
+        for labels, state in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(bucket_labels, labels + (_format_value(bound),))} {cumulative}"
+            label_text = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {_format_value(state[-1])}"
+            yield f"{self.name}_count{label_text} {cumulative}"
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_ShardedMetric] = []
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        """Registra uma função chamada a cada coleta (gauges e contadores externos)"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for family in collector():
+                lines.append(f"# HELP {family.name} {family.help}")
+                lines.append(f"# TYPE {family.name} {family.kind}")
+                for labels, value in family.samples:
+                    lines.append(f"{family.name}{_format_labels(tuple(labels), tuple(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+# HTTP
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "Requisições HTTP por rota e status", ("method", "route", "status")
+)
+HTTP_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "Duração das requisições HTTP (até o fim do corpo)", ("method", "route")
+)
+
+# LLM
+LLM_LATENCY = registry.histogram(
+    "llm_call_duration_seconds", "Duração das chamadas ao modelo", ("backend", "call", "outcome"),
+    buckets=LLM_LATENCY_BUCKETS
+)
+LLM_RETRIES = registry.counter("llm_retries_total", "Novas tentativas após sobrecarga do modelo", ("backend",))
+LLM_ERRORS = registry.counter("llm_errors_total", "Chamadas ao modelo que falharam", ("backend", "reason"))
+LLM_PROMPT_CHARS = registry.histogram(
+    "llm_prompt_chars", "Tamanho do prompt enviado ao modelo (caracteres)", ("backend",), buckets=CHARS_BUCKETS
+)
+LLM_OUTPUT_CHARS = registry.histogram(
+    "llm_output_chars", "Tamanho da resposta do modelo (caracteres)", ("backend",), buckets=CHARS_BUCKETS
+)
+
+# Banco de dados
+DB_QUERY_LATENCY = registry.histogram(
+    "db_query_duration_seconds", "Duração das consultas ao banco", ("engine", "operation")
+)
+DB_ERRORS = registry.counter("db_errors_total", "Consultas ao banco que falharam", ("engine",))
+
+# Rate limiting
+RATE_LIMIT_REJECTIONS = registry.counter(
+    "rate_limit_rejections_total", "Requisições rejeitadas pelo rate limit", ("limit",)
+)
+
+_DB_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Mede contagem e duração das consultas de uma engine (use engine.sync_engine nas assíncronas)"""
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_metrics_started", None)
+        if started is None:
+            return
+        keyword = statement.lstrip()[:6].upper()
+        operation = keyword if keyword in _DB_OPERATIONS else "OTHER"
+        DB_QUERY_LATENCY.observe(time.perf_counter() - started, name, operation)
+
+    def handle_error(exception_context):
+        DB_ERRORS.inc(name)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", handle_error)
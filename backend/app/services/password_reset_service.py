@@ -1,9 +1,12 @@
+import asyncio
 import secrets
 from datetime import datetime, timedelta
 from typing import Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.database import User, PasswordResetToken
 from app.services.auth_service import AuthService
+from app.services.auth_cache import auth_cache
 from app.services.email_service import EmailService
 
 class PasswordResetService:
@@ -13,18 +16,20 @@ class PasswordResetService:
         return secrets.token_urlsafe(32)
     
     @staticmethod
-    def create_reset_token(db: Session, email: str) -> Optional[str]:
+    async def create_reset_token(db: AsyncSession, email: str) -> Optional[str]:
         """Cria um token de recuperação de senha para o usuário"""
         # Buscar usuário por email
-        user = db.query(User).filter(User.email == email).first()
-        if not user:
+        user_id = await db.scalar(select(User.id).where(User.email == email))
+        if user_id is None:
             return None
         
         # Invalidar tokens anteriores do usuário
-        db.query(PasswordResetToken).filter(
-            PasswordResetToken.user_id == user.id,
-            PasswordResetToken.used == 0
-        ).update({"used": 1})
+        await db.execute(
+            update(PasswordResetToken).where(
+                PasswordResetToken.user_id == user_id,
+                PasswordResetToken.used == 0
+            ).values(used=1)
+        )
         
         # Gerar novo token
         token = PasswordResetService.generate_reset_token()
@@ -32,62 +37,69 @@ class PasswordResetService:
         
         # Salvar token no banco
         reset_token = PasswordResetToken(
-            user_id=user.id,
+            user_id=user_id,
             token=token,
             expires_at=expires_at
         )
         db.add(reset_token)
-        db.commit()
+        await db.commit()
         
         return token
     
     @staticmethod
-    def send_reset_email(db: Session, email: str) -> bool:
+    async def send_reset_email(db: AsyncSession, email: str) -> bool:
         """Cria token e envia email de recuperação"""
-        token = PasswordResetService.create_reset_token(db, email)
+        token = await PasswordResetService.create_reset_token(db, email)
         if not token:
             return False
         
-        # Enviar email
-        return EmailService.send_password_reset_email(email, token)
+        # Enviar email (SMTP bloqueante, fora do event loop)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, EmailService.send_password_reset_email, email, token)
     
     @staticmethod
-    def validate_reset_token(db: Session, token: str) -> Optional[User]:
+    async def validate_reset_token(db: AsyncSession, token: str) -> Optional[User]:
         """Valida token de recuperação e retorna o usuário"""
-        reset_token = db.query(PasswordResetToken).filter(
-            PasswordResetToken.token == token,
-            PasswordResetToken.used == 0,
-            PasswordResetToken.expires_at > datetime.utcnow()
-        ).first()
-        
-        if not reset_token:
-            return None
-        
-        return reset_token.user
+        result = await db.execute(
+            select(User).join(PasswordResetToken, PasswordResetToken.user_id == User.id).where(
+                PasswordResetToken.token == token,
+                PasswordResetToken.used == 0,
+                PasswordResetToken.expires_at > datetime.utcnow()
+            )
+        )
+        return result.scalars().first()
     
     @staticmethod
-    def reset_password(db: Session, token: str, new_password: str) -> bool:
+    async def reset_password(db: AsyncSession, token: str, new_password: str) -> bool:
         """Redefine a senha do usuário usando o token"""
         # Validar token
-        reset_token = db.query(PasswordResetToken).filter(
-            PasswordResetToken.token == token,
-            PasswordResetToken.used == 0,
-            PasswordResetToken.expires_at > datetime.utcnow()
-        ).first()
+        result = await db.execute(
+            select(PasswordResetToken).where(
+                PasswordResetToken.token == token,
+                PasswordResetToken.used == 0,
+                PasswordResetToken.expires_at > datetime.utcnow()
+            )
+        )
+        reset_token = result.scalars().first()
         
         if not reset_token:
             return False
         
         # Buscar usuário
-        user = db.query(User).filter(User.id == reset_token.user_id).first()
+        user = await db.get(User, reset_token.user_id)
         if not user:
             return False
         
-        # Atualizar senha
-        user.hashed_password = AuthService.get_password_hash(new_password)
+        # Atualizar senha (bcrypt no pool dedicado, só depois de validar o token)
+        user.hashed_password = await AuthService.get_password_hash_async(new_password)
+        # Revoga os tokens emitidos com a senha anterior
+        user.credential_version = User.credential_version + 1
         
         # Marcar token como usado
         reset_token.used = 1
         
-        db.commit()
-        return True
\ No newline at end of file
+        await db.commit()
+        
+        # Tokens antigos em cache neste processo caem já; nos demais, ao fim do TTL do cache
+        auth_cache.invalidate_user(user.id)
+        return True
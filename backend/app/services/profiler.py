@@ -0,0 +1,71 @@
+import collections
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from typing import Optional
+from ..config.logging import get_logger
+
+logger = get_logger("profiler")
+
+def _fold(thread_name: str, frame) -> str:
+    # Pilha da raiz até a função atual, no formato "folded" (thread;a;b;c)
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    names.append(thread_name)
+    return ";".join(reversed(names))
+
+class StackSampler:
+    """
+    Profiler estatístico: uma thread auxiliar copia a pilha de todas as
+    threads a cada `interval` segundos, com o nome da thread na raiz (event
+    loop, pools do Gemini e do bcrypt). O custo fica na thread auxiliar;
+    o código observado não é instrumentado.
+
+    As amostras incluem o que as requisições concorrentes executaram no
+    mesmo período; o tempo ocioso do event loop aparece no select do loop.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: collections.Counter = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self.stacks[_fold(names.get(thread_id, str(thread_id)), frame)] += 1
+
+    def folded(self) -> str:
+        """Uma linha "pilha contagem" por pilha (flamegraph.pl, speedscope, inferno)"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+def write_profile(directory: str, method: str, path: str, elapsed_ms: float,
+                  sampler: StackSampler) -> Optional[str]:
+    """Grava o perfil de uma requisição em `directory`; devolve o caminho do arquivo"""
+    if not sampler.stacks:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") or "root"
+    filename = f"{time.strftime('%Y%m%d-%H%M%S')}_{method}_{slug}_{int(elapsed_ms)}ms_{uuid.uuid4().hex[:6]}.folded"
+    file_path = os.path.join(directory, filename)
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write(sampler.folded())
+    logger.info(f"Perfil de {method} {path} ({elapsed_ms:.0f} ms) gravado em {file_path}")
+    return file_path
@@ -0,0 +1,170 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, NamedTuple, Optional, Protocol
+from ..config.logging import get_logger
+from ..config.settings import Settings, get_settings
+
+logger = get_logger("rate_limiter")
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    remaining: int
+    reset_after: float  # Segundos até a cota encher de novo
+    retry_after: float  # Segundos até a próxima chamada ser aceita (0 se aceita)
+
+def gcra(tat: Optional[float], now: float, limit: int, period: float):
+    """
+    Generic Cell Rate Algorithm: o estado de cada cliente é um único número,
+    o TAT (theoretical arrival time). Permite rajadas de até `limit` chamadas
+    e repõe uma a cada period/limit segundos.
+
+    Devolve (novo TAT ou None se a chamada foi rejeitada, resultado).
+    """
+    interval = period / limit
+    tat = now if tat is None else max(tat, now)
+    new_tat = tat + interval
+    allow_at = new_tat - period
+    if now < allow_at:
+        return None, RateLimitResult(False, 0, tat - now, allow_at - now)
+    # Tolerância para o arredondamento de timestamps grandes (time.time())
+    remaining = int(math.floor((period - (new_tat - now)) / interval + 1e-6))
+    return new_tat, RateLimitResult(True, max(remaining, 0), new_tat - now, 0.0)
+
+class RateLimitStore(Protocol):
+    """Armazena o TAT por chave e aplica o GCRA de forma atômica"""
+    name: str
+    blocking: bool  # hit() faz I/O e deve rodar fora do event loop
+
+    def hit(self, key: str, limit: int, period: float) -> RateLimitResult: ...
+
+class MemoryRateLimitStore:
+    """
+    Estado por processo: um float por cliente. Chaves ociosas (TAT no
+    passado, ou seja, cota cheia) são descartadas a cada sweep_interval,
+    então a memória acompanha só os clientes ativos.
+    """
+    name = "memory"
+    blocking = False
+
+    def __init__(self, sweep_interval: float = 60.0):
+        self.sweep_interval = sweep_interval
+        self._tats: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    def hit(self, key: str, limit: int, period: float) -> RateLimitResult:
+        now = time.monotonic()
+        with self._lock:
+            new_tat, result = gcra(self._tats.get(key), now, limit, period)
+            if new_tat is not None:
+                self._tats[key] = new_tat
+            if now >= self._next_sweep:
+                self._sweep(now)
+            return result
+
+    def _sweep(self, now: float) -> None:
+        self._tats = {key: tat for key, tat in self._tats.items() if tat > now}
+        self._next_sweep = now + self.sweep_interval
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+class SQLiteRateLimitStore:
+    """
+    Estado compartilhado entre workers da mesma máquina, num arquivo SQLite
+    (WAL). Cada chamada é um único UPSERT atômico; chaves ociosas são
+    apagadas periodicamente.
+
+    Com o arquivo travado por mais de busy_timeout, ou qualquer outro erro
+    do SQLite, a chamada é aceita (fail open): o rate limit nunca derruba
+    a requisição.
+    """
+    name = "sqlite"
+    blocking = True
+
+    def __init__(self, path: str, sweep_interval: float = 60.0, busy_timeout: float = 0.05):
+        self.path = path
+        self.sweep_interval = sweep_interval
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._sweep_lock = threading.Lock()
+        self._next_sweep = 0.0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute("CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit: cada UPSERT é sua própria transação
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key: str, limit: int, period: float) -> RateLimitResult:
+        try:
+            return self._hit(key, limit, period)
+        except sqlite3.Error as e:
+            logger.warning(f"Rate limit indisponível, requisição liberada ({key}): {e}")
+            return RateLimitResult(True, limit, 0.0, 0.0)
+
+    def _hit(self, key: str, limit: int, period: float) -> RateLimitResult:
+        # Relógio de parede: o TAT é comparado entre processos
+        now = time.time()
+        interval = period / limit
+        conn = self._connection()
+        row = conn.execute(
+            "INSERT INTO rate_limits (key, tat) VALUES (:key, :now + :interval) "
+            "ON CONFLICT (key) DO UPDATE SET tat = max(tat, :now) + :interval "
+            "WHERE max(tat, :now) + :interval - :period <= :now "
+            "RETURNING tat",
+            {"key": key, "now": now, "interval": interval, "period": period}
+        ).fetchone()
+        if row is not None:
+            # Aceita: reconstrói o resultado a partir do TAT gravado
+            _, result = gcra(row[0] - interval, now, limit, period)
+        else:
+            current = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            _, result = gcra(current[0] if current else None, now, limit, period)
+            if result.allowed:
+                # Outro worker mudou o estado entre as duas consultas; vale a decisão do UPSERT
+                result = RateLimitResult(False, 0, result.reset_after, 0.0)
+        self._maybe_sweep(conn, now)
+        return result
+
+    def _maybe_sweep(self, conn: sqlite3.Connection, now: float) -> None:
+        if now < self._next_sweep or not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_sweep = now + self.sweep_interval
+            conn.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,))
+        except sqlite3.Error as e:
+            logger.warning(f"Falha ao limpar chaves ociosas do rate limit: {e}")
+        finally:
+            self._sweep_lock.release()
+
+STORES: Dict[str, Callable[[Settings], RateLimitStore]] = {
+    "memory": lambda settings: MemoryRateLimitStore(settings.rate_limit_sweep_seconds),
+    "sqlite": lambda settings: SQLiteRateLimitStore(
+        settings.rate_limit_sqlite_path, settings.rate_limit_sweep_seconds,
+        settings.rate_limit_sqlite_busy_timeout_ms / 1000
+    ),
+}
+
+def get_rate_limit_store(settings: Optional[Settings] = None) -> RateLimitStore:
+    """Instancia o armazenamento configurado em settings.rate_limit_backend"""
+    settings = settings or get_settings()
+    factory = STORES.get(settings.rate_limit_backend)
+    if factory is None:
+        raise ValueError(
+            f"Backend de rate limit desconhecido: {settings.rate_limit_backend}. "
+            f"Opções: {', '.join(sorted(STORES))}"
+        )
+    return factory(settings)
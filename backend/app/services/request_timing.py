@@ -0,0 +1,74 @@
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Iterator, Optional, Tuple
+
+class RequestTiming:
+    """
+    Tempo acumulado por fase (auth, db, llm, ...) de uma requisição.
+
+    Trechos sobrepostos da mesma fase (aninhados, ou em tasks concorrentes
+    de um gather) contam uma vez só: mede-se o tempo de relógio em que
+    havia ao menos um trecho aberto, não a soma das durações.
+    """
+    __slots__ = ("durations", "_open", "_started")
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+        self._open: Dict[str, int] = {}
+        self._started: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def enter(self, name: str) -> None:
+        count = self._open.get(name, 0)
+        if count == 0:
+            self._started[name] = time.perf_counter()
+        self._open[name] = count + 1
+
+    def exit(self, name: str) -> None:
+        count = self._open[name] - 1
+        self._open[name] = count
+        if count == 0:
+            self.add(name, time.perf_counter() - self._started.pop(name))
+
+    def server_timing(self, total: float) -> str:
+        """Valor do header Server-Timing, com as durações em milissegundos"""
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.durations.items()]
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+def start_request() -> Tuple[RequestTiming, Token]:
+    """Inicia a medição da requisição no contexto atual"""
+    timing = RequestTiming()
+    return timing, _current.set(timing)
+
+def end_request(token: Token) -> None:
+    _current.reset(token)
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Mede o bloco como a fase `name` da requisição atual (sem requisição, não faz nada)"""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    timing.enter(name)
+    try:
+        yield
+    finally:
+        timing.exit(name)
+
+def timed(name: str):
+    """Decorator de corrotinas: a chamada inteira conta como a fase `name`"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with phase(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,223 @@
+import re
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import Select, column, false, func, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.sql.elements import TextClause
+from ..config.database import engine
+from ..config.logging import get_logger
+from ..models.database import Summary
+
+logger = get_logger("search_index")
+
+# Documento indexado: o resumo pesa mais que o texto original no ranking
+_PG_DOCUMENT = (
+    "setweight(to_tsvector('portuguese', {unaccent}(:summary_text)), 'A') || "
+    "setweight(to_tsvector('portuguese', {unaccent}(:original_text)), 'B')"
+)
+
+class SearchIndex:
+    """
+    Índice de busca textual do histórico, mantido na mesma transação que
+    cria/remove os resumos.
+
+    PostgreSQL: tabela summary_search com tsvector (português, sem acentos
+    via unaccent) e índice GIN composto (user_id, document). SQLite: tabela
+    virtual FTS5 sem conteúdo, com remove_diacritics e o user_id como
+    coluna indexada. Nos dois, a busca percorre só os documentos do
+    usuário, não o corpus inteiro. Outros bancos continuam com ILIKE.
+    """
+
+    def __init__(self, bind: Engine):
+        self.dialect = bind.dialect.name
+        self.unaccent = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.dialect in ("postgresql", "sqlite")
+
+    def ensure_schema(self, bind: Engine) -> None:
+        """Cria o índice (idempotente) e indexa resumos que ainda não estão nele"""
+        if self.dialect == "sqlite":
+            with bind.begin() as conn:
+                # Sem conteúdo (content=''): o índice não guarda outra cópia dos textos,
+                # que ficam só comprimidos em text_blobs. Índices antigos (com conteúdo
+                # ou sem a coluna user_id) são refeitos.
+                existing = conn.execute(text(
+                    "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'summary_search'"
+                )).scalar()
+                if existing and ("content=''" not in existing or "user_id" not in existing):
+                    conn.execute(text("DROP TABLE summary_search"))
+                    existing = None
+                conn.execute(text(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS summary_search USING fts5("
+                    "summary_text, original_text, user_id, content='', tokenize='unicode61 remove_diacritics 2')"
+                ))
+                if not existing:
+                    # user_id só filtra: peso zero no bm25
+                    conn.execute(text(
+                        "INSERT INTO summary_search (summary_search, rank) VALUES ('rank', 'bm25(1.0, 1.0, 0.0)')"
+                    ))
+            self._backfill(bind, "SELECT id FROM summaries WHERE id NOT IN (SELECT rowid FROM summary_search)")
+        elif self.dialect == "postgresql":
+            try:
+                with bind.begin() as conn:
+                    conn.execute(text("CREATE EXTENSION IF NOT EXISTS unaccent"))
+                    # unaccent() não é IMMUTABLE; o wrapper permite usá-la em índices e consultas
+                    conn.execute(text(
+                        "CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text "
+                        "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS "
+                        "$$ SELECT public.unaccent('public.unaccent', $1) $$"
+                    ))
+                self.unaccent = True
+            except Exception as e:
+                logger.warning(f"Extensão unaccent indisponível, busca diferenciará acentos: {e}")
+
+            try:
+                with bind.begin() as conn:
+                    # Permite user_id (btree) e document (tsvector) no mesmo índice GIN
+                    conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gin"))
+                per_user_index = True
+            except Exception as e:
+                per_user_index = False
+                logger.warning(f"Extensão btree_gin indisponível, índice de busca não será por usuário: {e}")
+
+            with bind.begin() as conn:
+                conn.execute(text(
+                    "CREATE TABLE IF NOT EXISTS summary_search ("
+                    "summary_id INTEGER PRIMARY KEY REFERENCES summaries(id) ON DELETE CASCADE, "
+                    "user_id INTEGER NOT NULL, "
+                    "document TSVECTOR NOT NULL)"
+                ))
+                if per_user_index:
+                    conn.execute(text(
+                        "CREATE INDEX IF NOT EXISTS ix_summary_search_user_document "
+                        "ON summary_search USING GIN (user_id, document)"
+                    ))
+                    # Substituídos pelo índice composto
+                    conn.execute(text("DROP INDEX IF EXISTS ix_summary_search_document"))
+                    conn.execute(text("DROP INDEX IF EXISTS ix_summary_search_user_id"))
+                else:
+                    conn.execute(text(
+                        "CREATE INDEX IF NOT EXISTS ix_summary_search_document ON summary_search USING GIN (document)"
+                    ))
+                    conn.execute(text(
+                        "CREATE INDEX IF NOT EXISTS ix_summary_search_user_id ON summary_search (user_id)"
+                    ))
+            self._backfill(
+                bind,
+                "SELECT s.id FROM summaries s LEFT JOIN summary_search ss ON ss.summary_id = s.id "
+                "WHERE ss.summary_id IS NULL"
+            )
+        else:
+            logger.info(f"Busca textual indexada não suportada em {self.dialect}; usando ILIKE")
+
+    def _backfill(self, bind: Engine, missing_ids_sql: str, batch_size: int = 500) -> None:
+        # Os textos originais estão comprimidos, então a indexação passa pelo Python
+        with Session(bind) as db:
+            missing = [row[0] for row in db.execute(text(missing_ids_sql))]
+            for start in range(0, len(missing), batch_size):
+                summaries = db.query(Summary).options(joinedload(Summary.original_blob)).filter(
+                    Summary.id.in_(missing[start:start + batch_size])
+                )
+                for summary in summaries:
+                    statement = self._add_statement(summary.id, summary.user_id, summary.original_text, summary.summary_text)
+                    db.execute(*statement)
+                db.commit()
+        if missing:
+            logger.info(f"{len(missing)} resumos adicionados ao índice de busca")
+
+    def _pg_document(self) -> str:
+        return _PG_DOCUMENT.format(unaccent="f_unaccent" if self.unaccent else "")
+
+    def _add_statement(self, summary_id: int, user_id: int, original_text: str,
+                       summary_text: str) -> Optional[Tuple[TextClause, Dict[str, object]]]:
+        if self.dialect == "sqlite":
+            return (
+                text(
+                    "INSERT INTO summary_search (rowid, summary_text, original_text, user_id) "
+                    "VALUES (:id, :summary_text, :original_text, :user_id)"
+                ),
+                {"id": summary_id, "summary_text": summary_text, "original_text": original_text, "user_id": user_id}
+            )
+        if self.dialect == "postgresql":
+            return (
+                text(f"INSERT INTO summary_search (summary_id, user_id, document) VALUES (:id, :user_id, {self._pg_document()})"),
+                {"id": summary_id, "user_id": user_id, "summary_text": summary_text, "original_text": original_text}
+            )
+        return None
+
+    async def add(self, db: AsyncSession, summary_id: int, user_id: int, original_text: str, summary_text: str) -> None:
+        """Indexa um resumo recém-criado (sem commit)"""
+        statement = self._add_statement(summary_id, user_id, original_text, summary_text)
+        if statement is not None:
+            await db.execute(*statement)
+
+    async def remove(self, db: AsyncSession, summary: Summary) -> None:
+        """Remove um resumo do índice (sem commit); summary precisa do texto original carregado"""
+        if self.dialect == "sqlite":
+            # Tabela FTS5 sem conteúdo: a remoção precisa dos mesmos valores indexados
+            await db.execute(
+                text(
+                    "INSERT INTO summary_search (summary_search, rowid, summary_text, original_text, user_id) "
+                    "VALUES ('delete', :id, :summary_text, :original_text, :user_id)"
+                ),
+                {
+                    "id": summary.id, "summary_text": summary.summary_text,
+                    "original_text": summary.original_text, "user_id": summary.user_id
+                }
+            )
+        elif self.dialect == "postgresql":
+            await db.execute(text("DELETE FROM summary_search WHERE summary_id = :id"), {"id": summary.id})
+
+    @staticmethod
+    def _terms(search_term: str) -> List[str]:
+        # Só palavras: a sintaxe de consulta de cada banco nunca vem do usuário
+        return re.findall(r"\w+", search_term)
+
+    def filter(self, query: Select, user_id: int, search_term: str, ranked: bool = True) -> Select:
+        """
+        Restringe a consulta (select) de Summary aos resumos que casam com a busca.
+        Cada termo casa por prefixo e todos precisam aparecer. Com ranked=True
+        ordena por relevância (e depois pelos mais recentes).
+        """
+        terms = self._terms(search_term)
+        if not terms:
+            return query.where(false())
+
+        if self.dialect == "sqlite":
+            fts = table("summary_search", column("rowid"), column("rank"))
+            # O termo user_id restringe a busca aos documentos do usuário dentro do índice
+            match = f"user_id:{int(user_id)} AND {{summary_text original_text}} : (" + " ".join(f'"{term}"*' for term in terms) + ")"
+            query = query.join(fts, fts.c.rowid == Summary.id).where(
+                text("summary_search MATCH :fts_query").bindparams(fts_query=match)
+            )
+            if ranked:
+                # rank do FTS5 (bm25): menor é mais relevante
+                query = query.order_by(fts.c.rank, Summary.created_at.desc())
+            return query
+
+        if self.dialect == "postgresql":
+            search = table("summary_search", column("summary_id"), column("user_id"), column("document"))
+            tsquery_text = " & ".join(f"{term}:*" for term in terms)
+            normalized = func.f_unaccent(tsquery_text) if self.unaccent else tsquery_text
+            tsquery = func.to_tsquery("portuguese", normalized)
+            query = query.join(search, search.c.summary_id == Summary.id).where(
+                search.c.user_id == user_id,
+                search.c.document.op("@@")(tsquery)
+            )
+            if ranked:
+                query = query.order_by(func.ts_rank_cd(search.c.document, tsquery).desc(), Summary.created_at.desc())
+            return query
+
+        # O texto original está comprimido; sem índice, a busca usa resumo e prévia
+        search_pattern = f"%{search_term}%"
+        query = query.where(
+            Summary.original_preview.ilike(search_pattern) | Summary.summary_text.ilike(search_pattern)
+        )
+        if ranked:
+            query = query.order_by(Summary.created_at.desc())
+        return query
+
+search_index = SearchIndex(engine)
@@ -0,0 +1,106 @@
+import hashlib
+import random
+import threading
+import time
+from typing import Callable, Dict, Iterator, Optional, Protocol
+from ..config.settings import Settings, get_settings
+
+class SummarizerBackend(Protocol):
+    """
+    Contrato mínimo de um backend de geração de texto.
+
+    Os métodos são bloqueantes: o GeminiService os executa no seu pool de
+    threads e cuida de cache, retries, map-reduce e streaming para SSE.
+    """
+    name: str
+    model_name: str
+
+    def generate(self, prompt: str) -> str: ...
+
+    def generate_stream(self, prompt: str) -> Iterator[str]: ...
+
+class GeminiBackend:
+    """Backend real, usando google.generativeai"""
+    name = "gemini"
+
+    def __init__(self, settings: Settings):
+        # Import tardio: o backend stub funciona sem o SDK instalado
+        import google.generativeai as genai
+
+        if not settings.gemini_api_key:
+            raise ValueError("GEMINI_API_KEY não configurada")
+        genai.configure(api_key=settings.gemini_api_key)
+        self.model_name = settings.gemini_model
+        self.model = genai.GenerativeModel(settings.gemini_model)
+
+    def generate(self, prompt: str) -> str:
+        response = self.model.generate_content(prompt)
+        return response.text
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        for chunk in self.model.generate_content(prompt, stream=True):
+            yield chunk.text
+
+class StubBackend:
+    """
+    Backend local e determinístico para testes de carga sem rede.
+
+    Simula latência (com jitter opcional) e injeta falhas: stub_overload_rate
+    gera erros "503 overloaded" (que o serviço tenta novamente) e
+    stub_failure_rate gera erros definitivos. Com stub_seed a sequência de
+    latências e falhas é reproduzível.
+    """
+    name = "stub"
+    model_name = "stub"
+
+    def __init__(self, settings: Settings):
+        self.latency = settings.stub_latency_ms / 1000
+        self.jitter = settings.stub_latency_jitter_ms / 1000
+        self.failure_rate = settings.stub_failure_rate
+        self.overload_rate = settings.stub_overload_rate
+        self._random = random.Random(settings.stub_seed)
+        self._lock = threading.Lock()
+
+    def _simulate(self) -> None:
+        with self._lock:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            sorteio = self._random.random()
+        time.sleep(delay)
+        if sorteio < self.overload_rate:
+            raise Exception("503 The model is overloaded (stub)")
+        if sorteio < self.overload_rate + self.failure_rate:
+            raise Exception("Falha simulada pelo backend stub")
+
+    @staticmethod
+    def _fake_summary(prompt: str) -> str:
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        return f"Resumo simulado de um prompt com {len(prompt.split())} palavras [{digest}]."
+
+    def generate(self, prompt: str) -> str:
+        self._simulate()
+        return self._fake_summary(prompt)
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        self._simulate()
+        for palavra in self._fake_summary(prompt).split(" "):
+            yield palavra + " "
+
+BACKENDS: Dict[str, Callable[[Settings], SummarizerBackend]] = {
+    "gemini": GeminiBackend,
+    "stub": StubBackend,
+}
+
+def register_backend(name: str, factory: Callable[[Settings], SummarizerBackend]) -> None:
+    """Registra um backend adicional, selecionável por SUMMARIZER_BACKEND"""
+    BACKENDS[name] = factory
+
+def get_backend(settings: Optional[Settings] = None) -> SummarizerBackend:
+    """Instancia o backend configurado em settings.summarizer_backend"""
+    settings = settings or get_settings()
+    factory = BACKENDS.get(settings.summarizer_backend)
+    if factory is None:
+        raise ValueError(
+            f"Backend de resumo desconhecido: {settings.summarizer_backend}. "
+            f"Opções: {', '.join(sorted(BACKENDS))}"
+        )
+    return factory(settings)
@@ -0,0 +1,189 @@
+import asyncio
+import hashlib
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from ..config.database import SessionLocal
+from ..config.logging import get_logger
+from ..config.settings import get_settings
+from ..models.database import CachedSummary
+
+logger = get_logger("summary_cache")
+
+class SummaryCache:
+    """
+    Cache de resumos endereçado por conteúdo.
+
+    Duas camadas: um LRU em memória com TTL (por processo) e uma tabela
+    no banco (summary_cache) compartilhada entre workers e reinícios.
+    Entradas expiradas do banco são apagadas a cada prune_interval
+    segundos, na primeira gravação depois do intervalo.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: int = 3600, db_ttl_days: int = 30,
+                 prune_interval: float = 3600, enabled: bool = True):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_ttl = timedelta(days=db_ttl_days)
+        self.prune_interval = prune_interval
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._prune_lock = threading.Lock()
+        self._next_prune = 0.0
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize_text(texto: str) -> str:
+        """Normaliza unicode e espaços para que reenvios do mesmo texto colidam"""
+        return " ".join(unicodedata.normalize("NFC", texto).split())
+
+    def make_key(self, texto: str, namespace: str) -> str:
+        """Chave = sha256(namespace do prompt/modelo + texto normalizado)"""
+        payload = f"{namespace}\n{self.normalize_text(texto)}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    # Camada em memória
+    def get_memory(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, summary = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return summary
+
+    def set_memory(self, key: str, summary: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, summary)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # Camada persistente (bloqueante, executada fora do event loop)
+    def get_durable(self, key: str) -> Optional[str]:
+        db = SessionLocal()
+        try:
+            cached = db.query(CachedSummary).filter(
+                CachedSummary.key == key,
+                CachedSummary.created_at > datetime.utcnow() - self.db_ttl
+            ).first()
+            return cached.summary_text if cached else None
+        except Exception as e:
+            logger.warning(f"Falha ao ler cache persistente: {e}")
+            return None
+        finally:
+            db.close()
+
+    def set_durable(self, key: str, summary: str) -> None:
+        db = SessionLocal()
+        try:
+            db.merge(CachedSummary(key=key, summary_text=summary, created_at=datetime.utcnow()))
+            db.commit()
+        except Exception as e:
+            # Corrida entre workers gravando a mesma chave não é um erro
+            db.rollback()
+            logger.warning(f"Falha ao gravar cache persistente: {e}")
+        finally:
+            db.close()
+        self._maybe_prune()
+
+    def _maybe_prune(self) -> None:
+        now = time.monotonic()
+        if now < self._next_prune or not self._prune_lock.acquire(blocking=False):
+            return
+        db = SessionLocal()
+        try:
+            self._next_prune = now + self.prune_interval
+            deleted = db.query(CachedSummary).filter(
+                CachedSummary.created_at <= datetime.utcnow() - self.db_ttl
+            ).delete(synchronize_session=False)
+            db.commit()
+            if deleted:
+                logger.info(f"{deleted} resumos expirados removidos do cache persistente")
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Falha ao limpar cache persistente: {e}")
+        finally:
+            db.close()
+            self._prune_lock.release()
+
+    def get(self, key: str) -> Optional[str]:
+        """Busca nas duas camadas, promovendo acertos do banco para a memória"""
+        if not self.enabled:
+            return None
+        summary = self.get_memory(key)
+        if summary is not None:
+            self.memory_hits += 1
+            return summary
+        summary = self.get_durable(key)
+        if summary is not None:
+            self.db_hits += 1
+            self.set_memory(key, summary)
+            return summary
+        self.misses += 1
+        return None
+
+    def set(self, key: str, summary: str) -> None:
+        if not self.enabled:
+            return
+        self.set_memory(key, summary)
+        self.set_durable(key, summary)
+
+    async def get_async(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        # Acerto em memória não precisa sair do event loop
+        summary = self.get_memory(key)
+        if summary is not None:
+            self.memory_hits += 1
+            return summary
+        loop = asyncio.get_running_loop()
+        summary = await loop.run_in_executor(None, self.get_durable, key)
+        if summary is not None:
+            self.db_hits += 1
+            self.set_memory(key, summary)
+            return summary
+        self.misses += 1
+        return None
+
+    async def set_async(self, key: str, summary: str) -> None:
+        if not self.enabled:
+            return
+        self.set_memory(key, summary)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.set_durable, key, summary)
+
+    def stats(self) -> Dict[str, object]:
+        """Contadores de acerto/erro para o health check"""
+        lookups = self.memory_hits + self.db_hits + self.misses
+        hits = self.memory_hits + self.db_hits
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0
+        }
+
+def _build_cache() -> SummaryCache:
+    settings = get_settings()
+    return SummaryCache(
+        max_entries=settings.summary_cache_max_entries,
+        ttl_seconds=settings.summary_cache_ttl_seconds,
+        db_ttl_days=settings.summary_cache_db_ttl_days,
+        prune_interval=settings.summary_cache_prune_interval_seconds,
+        enabled=settings.summary_cache_enabled
+    )
+
+summary_cache = _build_cache()
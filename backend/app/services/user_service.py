@@ -1,16 +1,28 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, exists, func, literal, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, load_only
 from sqlalchemy.exc import IntegrityError
-from ..models.database import User, Summary
+from ..models.database import User, Summary, TextBlob, make_preview
 from ..models.schemas import UserCreate
 from .auth_service import AuthService
-from typing import Optional, List
+from .request_timing import timed
+from .search_index import search_index
+from datetime import datetime
+from typing import AsyncIterator, Optional, List, Tuple
+import base64
+import json
 
 class UserService:
     @staticmethod
-    def create_user(db: Session, user_data: UserCreate) -> Optional[User]:
-        """Cria um novo usuário"""
+    @timed("db")
+    async def create_user(db: AsyncSession, user_data: UserCreate, hashed_password: Optional[str] = None) -> Optional[User]:
+        """Cria um novo usuário
+        
+        hashed_password permite passar o hash já calculado fora do event loop.
+        """
         try:
-            hashed_password = AuthService.get_password_hash(user_data.password)
+            if hashed_password is None:
+                hashed_password = await AuthService.get_password_hash_async(user_data.password)
             db_user = User(
                 email=user_data.email,
                 username=user_data.email.split('@')[0],  # Usar parte do email como username
@@ -18,79 +30,195 @@ class UserService:
                 hashed_password=hashed_password
             )
             db.add(db_user)
-            db.commit()
-            db.refresh(db_user)
+            await db.commit()
+            await db.refresh(db_user)
             return db_user
         except IntegrityError:
-            db.rollback()
+            await db.rollback()
             return None
     
     @staticmethod
-    def get_user_by_email(db: Session, email: str) -> Optional[User]:
+    @timed("db")
+    async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
         """Busca usuário por email"""
-        return db.query(User).filter(User.email == email).first()
+        result = await db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
     
     @staticmethod
-    def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
+    @timed("db")
+    async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
         """Busca usuário por ID"""
-        return db.query(User).filter(User.id == user_id).first()
+        return await db.get(User, user_id)
     
     @staticmethod
-    def get_user_summaries(db: Session, user_id: int, skip: int = 0, limit: int = 10, search_term: str = None) -> List[Summary]:
-        """Busca histórico de resumos do usuário com paginação e filtragem"""
-        query = db.query(Summary).filter(Summary.user_id == user_id)
+    @timed("db")
+    async def get_user_summaries(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 10, search_term: str = None,
+                                 cursor: Optional[Tuple[datetime, int]] = None) -> List[Summary]:
+        """Busca histórico de resumos do usuário com paginação e filtragem
         
-        # Aplicar filtro de busca se fornecido
-        if search_term:
-            search_pattern = f"%{search_term}%"
-            query = query.filter(
-                # Busca no texto original ou no resumo
-                (Summary.original_text.ilike(search_pattern) | 
-                 Summary.summary_text.ilike(search_pattern))
-            )
+        Com cursor (created_at, id) do último item da página anterior, a
+        página começa logo depois dele (keyset) e skip é ignorado. Só as
+        colunas da listagem são carregadas (original_text fica de fora).
+        """
+        query = select(Summary).options(load_only(
+            Summary.id, Summary.original_preview, Summary.original_words,
+            Summary.summary_text, Summary.created_at
+        )).where(Summary.user_id == user_id)
         
-        return query.order_by(Summary.created_at.desc()).offset(skip).limit(limit).all()
+        if search_term:
+            # Busca textual indexada, ordenada por relevância
+            query = search_index.filter(query, user_id, search_term).offset(skip)
+        else:
+            query = query.order_by(Summary.created_at.desc(), Summary.id.desc())
+            if cursor is not None:
+                created_at, summary_id = cursor
+                query = query.where(
+                    tuple_(Summary.created_at, Summary.id) < tuple_(UserService._cursor_datetime(db, created_at), summary_id)
+                )
+            else:
+                query = query.offset(skip)
         
+        result = await db.execute(query.limit(limit))
+        return list(result.scalars().all())
+    
     @staticmethod
-    def count_user_summaries(db: Session, user_id: int, search_term: str = None) -> int:
-        """Conta o total de resumos do usuário com filtragem opcional"""
-        query = db.query(Summary).filter(Summary.user_id == user_id)
+    async def iter_user_summaries(db: AsyncSession, user_id: int, search_term: str = None,
+                                  batch_size: int = 500) -> AsyncIterator[Tuple[int, str, str, datetime]]:
+        """Percorre todo o histórico do usuário em lotes, sem carregá-lo na memória
         
-        # Aplicar filtro de busca se fornecido
+        Devolve tuplas (id, original_text, summary_text, created_at), sem
+        hidratar objetos ORM. db.stream usa cursor do lado do servidor e
+        yield_per limita a memória a um lote.
+        """
+        query = select(
+            Summary.id, TextBlob.data, Summary.summary_text, Summary.created_at
+        ).join(TextBlob, TextBlob.hash == Summary.original_hash).where(Summary.user_id == user_id)
         if search_term:
-            search_pattern = f"%{search_term}%"
-            query = query.filter(
-                # Busca no texto original ou no resumo
-                (Summary.original_text.ilike(search_pattern) | 
-                 Summary.summary_text.ilike(search_pattern))
+            query = search_index.filter(query, user_id, search_term, ranked=False)
+        query = query.order_by(Summary.created_at.desc(), Summary.id.desc())
+        
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+        async for summary_id, data, summary_text, created_at in result:
+            yield summary_id, TextBlob.decompress(data), summary_text, created_at
+    
+    @staticmethod
+    def _cursor_datetime(db: AsyncSession, created_at: datetime):
+        # No SQLite as datas são texto; o default do servidor grava sem microssegundos,
+        # então o valor é comparado no mesmo formato em que foi armazenado
+        if db.bind.dialect.name == "sqlite":
+            return literal(str(created_at.replace(tzinfo=None)))
+        return created_at
+    
+    @staticmethod
+    def encode_cursor(summary: Summary) -> str:
+        """Cursor opaco com a posição (created_at, id) de um resumo"""
+        payload = json.dumps({"c": summary.created_at.isoformat(), "i": summary.id})
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+    
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        """Decodifica um cursor de encode_cursor; ValueError se for inválido"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            return datetime.fromisoformat(payload["c"]), int(payload["i"])
+        except Exception as e:
+            raise ValueError("Cursor inválido") from e
+    
+    @staticmethod
+    @timed("db")
+    async def count_user_summaries(db: AsyncSession, user_id: int, search_term: str = None,
+                                   cap: Optional[int] = None) -> int:
+        """Conta o total de resumos do usuário com filtragem opcional
+        
+        Sem busca, usa o contador mantido em users.summary_count. Com cap,
+        a contagem para em cap + 1 (basta para saber se passou do limite).
+        """
+        if not search_term:
+            return await UserService.get_summary_count(db, user_id)
+        
+        query = select(Summary.id).where(Summary.user_id == user_id)
+        query = search_index.filter(query, user_id, search_term, ranked=False)
+        if cap is not None:
+            query = query.limit(cap + 1)
+        return await db.scalar(select(func.count()).select_from(query.subquery()))
+    
+    @staticmethod
+    @timed("db")
+    async def get_summary_count(db: AsyncSession, user_id: int) -> int:
+        """Total de resumos do usuário pelo contador (consulta por chave primária)"""
+        count = await db.scalar(select(User.summary_count).where(User.id == user_id))
+        return count or 0
+    
+    @staticmethod
+    async def _increment_summary_count(db: AsyncSession, user_id: int, delta: int) -> None:
+        # Incremento atômico no banco, na mesma transação do insert/delete
+        await db.execute(
+            update(User).where(User.id == user_id).values(summary_count=User.summary_count + delta)
+        )
+    
+    @staticmethod
+    @timed("db")
+    async def get_user_summary(db: AsyncSession, summary_id: int, user_id: int) -> Optional[Summary]:
+        """Busca um resumo do usuário, com o texto original completo"""
+        result = await db.execute(
+            select(Summary).options(joinedload(Summary.original_blob)).where(
+                Summary.id == summary_id,
+                Summary.user_id == user_id
             )
-            
-        return query.count()
+        )
+        return result.scalars().first()
     
     @staticmethod
-    def delete_user_summary(db: Session, summary_id: int, user_id: int) -> bool:
+    @timed("db")
+    async def delete_user_summary(db: AsyncSession, summary_id: int, user_id: int) -> bool:
         """Deleta um resumo específico do usuário"""
-        summary = db.query(Summary).filter(
-            Summary.id == summary_id,
-            Summary.user_id == user_id
-        ).first()
-        
+        summary = await UserService.get_user_summary(db, summary_id, user_id)
         if not summary:
             return False
         
-        db.delete(summary)
-        db.commit()
+        original_hash = summary.original_hash
+        await search_index.remove(db, summary)
+        await db.delete(summary)
+        await db.flush()
+        if db.bind.dialect.name == "postgresql":
+            # Espera os inserts que travaram o texto (TextBlob.store) terminarem;
+            # o DELETE seguinte, em outro comando, já enxerga os resumos deles
+            await db.execute(select(TextBlob.hash).where(TextBlob.hash == original_hash).with_for_update())
+        # Texto original sem outras referências deixa de ser guardado
+        await db.execute(
+            delete(TextBlob).where(
+                TextBlob.hash == original_hash,
+                ~exists().where(Summary.original_hash == original_hash)
+            )
+        )
+        await UserService._increment_summary_count(db, user_id, -1)
+        await db.commit()
         return True
     
     @staticmethod
-    def create_summary(db: Session, user_id: int, original_text: str, summary_text: str) -> Summary:
-        """Cria um novo resumo para o usuário"""
+    @timed("db")
+    async def create_summary(db: AsyncSession, user_id: int, original_text: str, summary_text: str,
+                             commit: bool = True) -> Summary:
+        """Cria um novo resumo para o usuário
+        
+        Com commit=False o resumo só recebe flush, para fazer parte de uma
+        transação maior controlada por quem chama.
+        """
         db_summary = Summary(
             user_id=user_id,
-            original_text=original_text,
-            summary_text=summary_text
+            original_hash=await TextBlob.store(db, original_text),
+            summary_text=summary_text,
+            original_preview=make_preview(original_text),
+            original_words=len(original_text.split())
         )
         db.add(db_summary)
-        db.commit()
-        db.refresh(db_summary)
-        return db_summary
\ No newline at end of file
+        await db.flush()
+        # Índice de busca atualizado na mesma transação
+        await search_index.add(db, db_summary.id, user_id, original_text, summary_text)
+        await UserService._increment_summary_count(db, user_id, 1)
+        if not commit:
+            return db_summary
+        await db.commit()
+        await db.refresh(db_summary)
+        return db_summary
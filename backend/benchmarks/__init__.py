@@ -0,0 +1,10 @@
+"""
+Benchmarks de carga offline da API.
+
+Sobe o app com o backend de resumo stub e um banco SQLite semeado com N
+resumos, gera carga concorrente com httpx e grava latências (p50/p95/p99)
+e RPS em JSON, para comparar entre commits:
+
+    python -m benchmarks run --sizes 1000,100000 --output bench.json
+    python -m benchmarks compare antes.json depois.json
+"""
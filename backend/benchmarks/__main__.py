@@ -0,0 +1,220 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from .load import SCENARIOS, login, run_scenario
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Incrementar quando o formato dos dados semeados mudar (invalida os bancos em cache)
+SEED_VERSION = 2
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def seeded_database(data_dir: str, size: int, reseed: bool) -> str:
+    """Banco semeado com `size` resumos, reaproveitado entre execuções"""
+    path = os.path.join(data_dir, f"seed_v{SEED_VERSION}_{size}.sqlite")
+    if reseed or not os.path.exists(path):
+        for suffix in ("", "-wal", "-shm", ".tmp"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        print(f"Semeando {size} resumos em {path}", file=sys.stderr)
+        # Arquivo temporário: uma semeadura interrompida não vira cache
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.seed", "--database", path + ".tmp", "--size", str(size)],
+            cwd=BACKEND_DIR, check=True
+        )
+        os.replace(path + ".tmp", path)
+    return path
+
+def _server_env(database: str, args: argparse.Namespace) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{database}",
+        "SUMMARIZER_BACKEND": "stub",
+        "STUB_LATENCY_MS": str(args.stub_latency_ms),
+        "STUB_SEED": "1",
+        "DEBUG": "False",
+        # Rate limit continua no caminho da requisição, mas sem rejeitar a carga
+        "RATE_LIMIT_PER_MINUTE": "1000000000",
+        "AUTH_RATE_LIMIT_PER_MINUTE": "1000000000",
+        "JOB_WORKERS": "0",
+        "PROFILING_ENABLED": "False",
+    })
+    return env
+
+def start_server(database: str, port: int, args: argparse.Namespace) -> subprocess.Popen:
+    command = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(args.workers), "--no-access-log", "--log-level", "warning"
+    ]
+    log = open(os.path.join(args.data_dir, "server.log"), "ab")
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=_server_env(database, args), stdout=log, stderr=log)
+
+async def wait_until_ready(base_url: str, process: subprocess.Popen, timeout: float = 120) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError("Servidor encerrou durante a inicialização (veja server.log)")
+            try:
+                if (await client.get("/api/health/")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("Servidor não respondeu a tempo")
+
+async def run_size(size: int, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    seeded = seeded_database(args.data_dir, size, args.reseed)
+    # Cópia descartável: resumos criados no benchmark não alteram o banco semeado
+    database = os.path.join(args.data_dir, f"run_{size}.sqlite")
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(database + suffix):
+            os.remove(database + suffix)
+    shutil.copyfile(seeded, database)
+
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    process = start_server(database, port, args)
+    results = []
+    try:
+        await wait_until_ready(base_url, process)
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+            token = await login(client)
+            for name in args.scenarios:
+                print(f"[{size}] {name}...", file=sys.stderr)
+                result = await run_scenario(
+                    client, SCENARIOS[name], token, args.concurrency, args.duration, args.warmup
+                )
+                result["size"] = size
+                results.append(result)
+                latency = result["latency_ms"]
+                print(
+                    f"[{size}] {name}: {result['rps']} req/s, p50 {latency['p50']} ms, "
+                    f"p95 {latency['p95']} ms, p99 {latency['p99']} ms, {result['errors']} erros",
+                    file=sys.stderr
+                )
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return results
+
+def run(args: argparse.Namespace) -> None:
+    os.makedirs(args.data_dir, exist_ok=True)
+    results = []
+    for size in args.sizes:
+        results.extend(asyncio.run(run_size(size, args)))
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "config": {
+                "sizes": args.sizes,
+                "scenarios": args.scenarios,
+                "concurrency": args.concurrency,
+                "duration_seconds": args.duration,
+                "warmup_seconds": args.warmup,
+                "workers": args.workers,
+                "stub_latency_ms": args.stub_latency_ms
+            }
+        },
+        "results": results
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+        print(f"Resultados gravados em {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+def compare(args: argparse.Namespace) -> None:
+    """Tabela com a variação de RPS e latências entre dois relatórios"""
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = {(r["size"], r["scenario"]): r for r in json.load(f)["results"]}
+    with open(args.candidate, encoding="utf-8") as f:
+        candidate = json.load(f)["results"]
+
+    def delta(old: float, new: float) -> str:
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"{'tamanho':>9} {'cenário':<16} {'rps':>18} {'p50 ms':>18} {'p95 ms':>18} {'p99 ms':>18}")
+    for result in candidate:
+        old = baseline.get((result["size"], result["scenario"]))
+        if old is None:
+            continue
+        cells = [f"{result['rps']:.1f} ({delta(old['rps'], result['rps'])})"]
+        for key in ("p50", "p95", "p99"):
+            new_value, old_value = result["latency_ms"][key], old["latency_ms"][key]
+            cells.append(f"{new_value:.1f} ({delta(old_value, new_value)})")
+        print(f"{result['size']:>9} {result['scenario']:<16} " + " ".join(f"{cell:>18}" for cell in cells))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks de carga offline da API")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Semeia os bancos, sobe o app e mede os cenários")
+    run_parser.add_argument("--sizes", default="1000,100000,1000000",
+                            type=lambda value: [int(size) for size in value.split(",")],
+                            help="Quantidades de resumos no banco, separadas por vírgula")
+    run_parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                            type=lambda value: value.split(","),
+                            help=f"Cenários separados por vírgula ({', '.join(SCENARIOS)})")
+    run_parser.add_argument("--concurrency", type=int, default=16, help="Workers simultâneos por cenário")
+    run_parser.add_argument("--duration", type=float, default=10, help="Segundos medidos por cenário")
+    run_parser.add_argument("--warmup", type=float, default=2, help="Segundos de aquecimento por cenário")
+    run_parser.add_argument("--workers", type=int, default=1, help="Processos uvicorn")
+    run_parser.add_argument("--stub-latency-ms", type=int, default=50, help="Latência simulada do modelo")
+    run_parser.add_argument("--timeout", type=float, default=300, help="Timeout por requisição (s)")
+    run_parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "resumidor_bench"),
+                            help="Onde ficam os bancos semeados (reaproveitados) e o log do servidor")
+    run_parser.add_argument("--reseed", action="store_true", help="Semeia os bancos de novo")
+    run_parser.add_argument("--output", help="Arquivo JSON de saída (padrão: stdout)")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="Compara dois relatórios JSON")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        unknown = [name for name in args.scenarios if name not in SCENARIOS]
+        if unknown:
+            parser.error(f"Cenários desconhecidos: {', '.join(unknown)}")
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
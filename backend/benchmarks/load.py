@@ -0,0 +1,120 @@
+"""Gerador de carga: workers concorrentes em laço fechado contra um servidor HTTP"""
+import asyncio
+import itertools
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from .seed import BENCH_EMAIL, BENCH_PASSWORD, SEARCH_TERM
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str
+    params: Optional[Dict[str, Any]] = None
+    body: Optional[Callable[[int], Dict[str, Any]]] = None  # Recebe o número da requisição
+    authenticated: bool = True
+    max_concurrency: Optional[int] = None  # Limite próprio (ex.: exportação de todo o histórico)
+
+def _resumo_body(n: int) -> Dict[str, Any]:
+    # Texto diferente a cada requisição: mede a geração, não o cache de resumos
+    return {"texto_a_resumir": f"Requisição {n} do benchmark. " + "Texto para resumir com várias frases. " * 20}
+
+SCENARIOS: Dict[str, Scenario] = {
+    scenario.name: scenario for scenario in (
+        Scenario("login", "POST", "/api/auth/login",
+                 body=lambda n: {"email": BENCH_EMAIL, "password": BENCH_PASSWORD}, authenticated=False),
+        Scenario("resumir", "POST", "/api/resumir-texto", body=_resumo_body),
+        Scenario("historico", "GET", "/api/historico", params={"limit": 10}),
+        Scenario("historico_busca", "GET", "/api/historico", params={"limit": 10, "search": SEARCH_TERM}),
+        Scenario("export", "GET", "/api/historico/export", max_concurrency=2),
+    )
+}
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Percentil com interpolação linear (q entre 0 e 100)"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+def summarize(name: str, latencies: List[float], statuses: Dict[str, int], elapsed: float,
+              concurrency: int, bytes_received: int) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    errors = sum(count for status, count in statuses.items() if not status.startswith("2"))
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "requests": len(ordered),
+        "errors": errors,
+        "duration_seconds": round(elapsed, 3),
+        "rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(ordered, 50) * 1000, 3),
+            "p95": round(percentile(ordered, 95) * 1000, 3),
+            "p99": round(percentile(ordered, 99) * 1000, 3),
+            "mean": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+            "max": round(ordered[-1] * 1000, 3) if ordered else 0.0
+        },
+        "status": dict(sorted(statuses.items())),
+        "bytes_received": bytes_received
+    }
+
+async def login(client: httpx.AsyncClient) -> str:
+    response = await client.post("/api/auth/login", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, token: str, concurrency: int,
+                       duration: float, warmup: float) -> Dict[str, Any]:
+    """
+    Roda o cenário por `duration` segundos com `concurrency` workers em laço
+    fechado (cada worker espera a resposta antes da próxima requisição).
+    Requisições concluídas durante o aquecimento não entram no resultado;
+    as que começaram nele e terminaram depois (ex.: exportações longas) entram.
+    """
+    concurrency = min(concurrency, scenario.max_concurrency or concurrency)
+    headers = {"Authorization": f"Bearer {token}"} if scenario.authenticated else {}
+    counter = itertools.count()
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    received = 0
+    measure_from = time.perf_counter() + warmup
+    deadline = measure_from + duration
+
+    async def worker() -> None:
+        nonlocal received
+        while True:
+            started = time.perf_counter()
+            if started >= deadline:
+                return
+            n = next(counter)
+            size = 0
+            try:
+                async with client.stream(
+                    scenario.method, scenario.path, params=scenario.params, headers=headers,
+                    json=scenario.body(n) if scenario.body else None
+                ) as response:
+                    # Lê o corpo inteiro (a exportação é enviada em streaming)
+                    async for chunk in response.aiter_raw():
+                        size += len(chunk)
+                    status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            finished = time.perf_counter()
+            if finished < measure_from:
+                continue
+            latencies.append(finished - started)
+            statuses[status] = statuses.get(status, 0) + 1
+            received += size
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    # Requisições em andamento no fim do prazo terminam e contam no tempo total
+    elapsed = time.perf_counter() - measure_from
+    return summarize(scenario.name, latencies, statuses, elapsed, concurrency, received)
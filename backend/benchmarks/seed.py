@@ -0,0 +1,125 @@
+"""
+Semeia um banco com um usuário de benchmark e N resumos.
+
+Roda em processo próprio: DATABASE_URL precisa estar definida antes de
+importar o app (engine e índice de busca são criados na importação).
+
+    python -m benchmarks.seed --database /tmp/bench.sqlite --size 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "bench-password"
+# Palavra presente em 1% dos textos: a busca do benchmark devolve ~size/100 resultados
+SEARCH_TERM = "benchmarkalvo"
+SEARCH_EVERY = 100
+BATCH_SIZE = 5000
+
+VOCABULARY = (
+    "texto resumo dados sistema processo projeto cliente mercado empresa governo "
+    "pesquisa estudo análise resultado relatório política economia saúde educação "
+    "tecnologia ciência energia clima cidade região país pessoas equipe trabalho "
+    "produção serviço qualidade custo prazo meta risco plano decisão reunião "
+    "documento contrato proposta investimento crescimento desenvolvimento inovação "
+    "segurança transporte ambiente água agricultura indústria comércio finanças"
+).split()
+
+def make_text(rng: random.Random, index: int, words: int) -> str:
+    palavras = [rng.choice(VOCABULARY) for _ in range(words)]
+    if index % SEARCH_EVERY == 0:
+        palavras[rng.randrange(words)] = SEARCH_TERM
+    # Número do resumo no texto: todos os textos são distintos (sem deduplicação em text_blobs)
+    return f"Documento {index}. " + " ".join(palavras).capitalize() + "."
+
+def seed(size: int, seed_value: int = 42, text_words: int = 120) -> None:
+    from sqlalchemy import text
+    from sqlalchemy.dialects import postgresql, sqlite
+    from app.config.database import Base, engine
+    from app.models.database import Summary, TextBlob, User, ensure_indexes, make_preview
+    from app.models.migrations import run_migrations
+    from app.services.auth_service import AuthService
+    from app.services.search_index import search_index
+
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    ensure_indexes(engine)
+    search_index.ensure_schema(engine)
+
+    dialect_insert = postgresql.insert if engine.dialect.name == "postgresql" else sqlite.insert
+    rng = random.Random(seed_value)
+    started = time.perf_counter()
+    # Um resumo por segundo até agora: datas distintas, ordem estável no histórico
+    first_created = datetime.utcnow().replace(microsecond=0) - timedelta(seconds=size)
+
+    with engine.begin() as conn:
+        user_id = conn.execute(
+            User.__table__.insert().values(
+                email=BENCH_EMAIL,
+                username=BENCH_EMAIL.split("@")[0],
+                name="Benchmark",
+                hashed_password=AuthService.get_password_hash(BENCH_PASSWORD),
+                summary_count=size
+            ).returning(User.__table__.c.id)
+        ).scalar_one()
+
+    for start in range(0, size, BATCH_SIZE):
+        blobs, summaries, index_rows = [], [], []
+        for i in range(start, min(start + BATCH_SIZE, size)):
+            original = make_text(rng, i, text_words)
+            summary_text = " ".join(original.split()[:20])
+            digest = TextBlob.hash_text(original)
+            blobs.append({
+                "hash": digest,
+                "data": TextBlob.compress(original),
+                "size": len(original.encode("utf-8"))
+            })
+            summaries.append({
+                "id": i + 1,
+                "user_id": user_id,
+                "original_hash": digest,
+                "summary_text": summary_text,
+                "created_at": first_created + timedelta(seconds=i),
+                "original_preview": make_preview(original),
+                "original_words": len(original.split())
+            })
+            statement = search_index._add_statement(i + 1, user_id, original, summary_text)
+            if statement is not None:
+                index_rows.append(statement[1])
+        with engine.begin() as conn:
+            conn.execute(dialect_insert(TextBlob.__table__).on_conflict_do_nothing(index_elements=["hash"]), blobs)
+            conn.execute(Summary.__table__.insert(), summaries)
+            if index_rows:
+                conn.execute(statement[0], index_rows)
+        print(f"  {start + len(summaries)}/{size} resumos", file=sys.stderr)
+
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("SELECT setval(pg_get_serial_sequence('summaries', 'id'), :n)"), {"n": max(size, 1)})
+            conn.execute(text("ANALYZE"))
+        elif engine.dialect.name == "sqlite":
+            conn.execute(text("ANALYZE"))
+    if engine.dialect.name == "sqlite":
+        # Tudo no arquivo principal: o banco semeado pode ser copiado sem o -wal
+        with engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    engine.dispose()
+    print(f"Banco semeado com {size} resumos em {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Semeia o banco do benchmark")
+    parser.add_argument("--database", required=True, help="Arquivo SQLite (ou DATABASE_URL completa)")
+    parser.add_argument("--size", type=int, required=True, help="Número de resumos")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    url = args.database if "://" in args.database else f"sqlite:///{os.path.abspath(args.database)}"
+    os.environ["DATABASE_URL"] = url
+    seed(args.size, args.seed)
+
+if __name__ == "__main__":
+    main()
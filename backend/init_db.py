@@ -7,7 +7,9 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.config.database import engine, Base
-from app.models.database import User, Summary, PasswordResetToken  # Garante que todos os modelos sejam carregados
+from app.models.database import User, Summary, PasswordResetToken, CachedSummary, SummaryJob, ensure_indexes  # Garante que todos os modelos sejam carregados
+from app.models.migrations import run_migrations
+from app.services.search_index import search_index
 
 def init_database():
     print("Iniciando a criação das tabelas no banco de dados...")
@@ -15,6 +17,9 @@ def init_database():
         # O método create_all verifica quais tabelas já existem antes de criá-las.
         # É seguro de se executar múltiplas vezes.
         Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
+        ensure_indexes(engine)
+        search_index.ensure_schema(engine)
         print("Tabelas criadas com sucesso (ou já existentes).")
     except Exception as e:
         print(f"Ocorreu um erro ao criar as tabelas: {e}")
@@ -11,7 +11,9 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from backend.app.config.database import engine
-from backend.app.models.database import Base, User, Summary, PasswordResetToken
+from backend.app.models.database import Base, User, Summary, PasswordResetToken, CachedSummary, SummaryJob, ensure_indexes
+from backend.app.models.migrations import run_migrations
+from backend.app.services.search_index import search_index
 
 def init_production_database():
     """
@@ -23,12 +25,18 @@ def init_production_database():
         
         # Criar todas as tabelas
         Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
+        ensure_indexes(engine)
+        search_index.ensure_schema(engine)
         
         print("✅ Banco de dados inicializado com sucesso!")
         print("Tabelas criadas:")
         print("- users")
         print("- summaries")
         print("- password_reset_tokens")
+        print("- summary_cache")
+        print("- summary_jobs")
+        print("- summary_search (índice de busca textual)")
         
     except Exception as e:
         print(f"❌ Erro ao inicializar banco de dados: {e}")
@@ -35,7 +35,10 @@ import { PageSizeSelector } from "@/components/ui/page-size-selector";
 // Interfaces
 interface Summary {
   id: number;
-  original_text: string;
+  original_preview: string;
+  original_words: number;
+  // Só vem no detalhe (/api/historico/{id}); a listagem traz apenas a prévia
+  original_text?: string;
   summary_text: string;
   created_at: string;
 }
@@ -189,6 +192,8 @@ export default function DashboardPage() {
         // Adicionar ao histórico local
         const newSummary: Summary = {
           id: data.id,
+          original_preview: inputText.substring(0, 200),
+          original_words: inputText.split(' ').length,
           original_text: inputText,
           summary_text: data.resumo,
           created_at: data.created_at
@@ -235,10 +240,25 @@ export default function DashboardPage() {
     setError("");
   };
 
-  const handleSelectSummary = (summary: Summary) => {
+  const handleSelectSummary = async (summary: Summary) => {
     setSelectedSummary(summary);
-    setInputText(summary?.original_text || '');
+    setInputText(summary?.original_text || summary?.original_preview || '');
     setSummaryText(summary?.summary_text || '');
+
+    if (summary?.id && summary.original_text === undefined) {
+      // A listagem só traz a prévia; o texto completo vem do detalhe
+      try {
+        const response = await apiGet(API_ENDPOINTS.summaries.detail(summary.id));
+        if (response.ok) {
+          const detail: Summary = await response.json();
+          setSummaries(prev => prev.map(s => s.id === detail.id ? { ...s, original_text: detail.original_text } : s));
+          setSelectedSummary(current => current?.id === detail.id ? { ...current, original_text: detail.original_text } : current);
+          setInputText(current => (current === summary.original_preview ? detail.original_text || '' : current));
+        }
+      } catch (error) {
+        console.error('Erro ao carregar resumo:', error);
+      }
+    }
   };
 
   const handleDeleteSummary = async (summaryId: number) => {
@@ -439,7 +459,7 @@ export default function DashboardPage() {
                   >
                     <div className="flex items-start justify-between mb-1 md:mb-2">
                       <h4 className="text-xs md:text-sm font-medium truncate flex-1">
-                      {(summary && summary.original_text) ? summary.original_text.substring(0, 40) : 'Resumo sem título'}...
+                      {(summary && summary.original_preview) ? summary.original_preview.substring(0, 40) : 'Resumo sem título'}...
                     </h4>
                       <Button 
                         variant="ghost" 
@@ -459,7 +479,7 @@ export default function DashboardPage() {
                       {summary && summary.summary_text ? summary.summary_text : ''}
                     </p>
                     <div className="flex items-center justify-between text-[10px] md:text-xs text-muted-foreground">
-                      <span>{(summary && summary.original_text) ? summary.original_text.split(' ').length : 0} palavras</span>
+                      <span>{summary?.original_words ?? 0} palavras</span>
                       <span>{(summary && summary.created_at) ? formatDate(summary.created_at) : ''}</span>
                     </div>
                   </motion.div>
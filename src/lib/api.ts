@@ -15,6 +15,7 @@ export const API_ENDPOINTS = {
   summaries: {
     create: '/api/resumir-texto',
     list: '/api/historico',
+    detail: (id: number) => `/api/historico/${id}`,
     delete: (id: number) => `/api/historico/${id}`,
     export: '/api/historico/export',
   },